@@ -0,0 +1,192 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from accident_store import MEASURE_COLUMNS
+
+# ----------------------------
+# 일자 x 시군구 x 항목 집계 큐브
+# ----------------------------
+
+# 불러온 일자별 시군구별 데이터를 한 번만 (날짜, 시군구, 항목) 3차원 배열로 변환해 두고,
+# 이후의 날짜 조회는 전체 행을 다시 훑지 않고 배열 인덱스 계산만으로 처리한다.
+# 날짜 축은 첫 날부터 마지막 날까지 빠짐없이 이어지므로 날짜의 위치는 (날짜 - 시작일).days 로 바로 구할 수 있다.
+# 데이터프레임 전체 대신 청크를 하나씩 더해 만들 수도 있으며(from_chunks), 이때 메모리는 원본 행 수가 아니라
+# 큐브 크기(일수 x 시군구 수 x 항목 수)에만 비례한다.
+
+
+class DailyAccidentCube:
+    def __init__(self, df, measures=MEASURE_COLUMNS):
+        self.measures = list(measures)
+
+        day_numbers = _day_numbers(df['발생년도'], df['발생월'], df['발생일'])
+        self.start = day_numbers.min()
+        self.dates = pd.date_range(_to_timestamp(self.start), _to_timestamp(day_numbers.max()), freq='D')
+
+        # 시도, 시군구 쌍을 지역 축으로 사용
+        region_codes, regions = pd.MultiIndex.from_arrays([df['시도'], df['시군구']]).factorize()
+        self.regions = regions.set_names(['시도', '시군구'])
+
+        # 같은 (날짜, 시군구)가 여러 번 나와도 합산되도록 bincount로 채움
+        self.values = np.zeros((len(self.dates), len(self.regions), len(self.measures)), dtype=np.int32)
+        _accumulate(self.values, day_numbers - self.start, region_codes, df, self.measures)
+
+        # 전국 합계는 자주 쓰이므로 미리 계산
+        self.daily_totals = self.values.sum(axis=1, dtype=np.int64)
+
+    # 데이터프레임 청크들을 차례로 더해 큐브 생성 (accident_store.iter_daily_chunks와 함께 사용)
+    # 연도별 (일수, 시군구, 항목) 블록에 청크를 바로 더하고, 새 시군구가 나오면 블록의 지역 축을 늘린다.
+    # 지역 순서는 처음 나온 순서이므로 데이터프레임 전체로 만든 큐브와 결과가 같다.
+    @classmethod
+    def from_chunks(cls, chunks, measures=MEASURE_COLUMNS):
+        measures = list(measures)
+        region_ids = {}
+        blocks = {}
+        capacity = 0
+        first_day = last_day = None
+
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            day_numbers = _day_numbers(chunk['발생년도'], chunk['발생월'], chunk['발생일'])
+            first_day = day_numbers.min() if first_day is None else min(first_day, day_numbers.min())
+            last_day = day_numbers.max() if last_day is None else max(last_day, day_numbers.max())
+
+            # 청크 안의 지역 번호를 전체 지역 번호로 변환
+            local_codes, local_regions = pd.MultiIndex.from_arrays([chunk['시도'], chunk['시군구']]).factorize()
+            mapping = np.array([region_ids.setdefault(region, len(region_ids)) for region in local_regions])
+            region_codes = mapping[local_codes]
+            if len(region_ids) > capacity:
+                capacity = max(len(region_ids), 2 * capacity)
+                for year, block in blocks.items():
+                    blocks[year] = np.pad(block, ((0, 0), (0, capacity - block.shape[1]), (0, 0)))
+
+            years = chunk['발생년도'].to_numpy()
+            for year in np.unique(years):
+                year = int(year)
+                year_start, n_days = _year_span(year)
+                if year not in blocks:
+                    blocks[year] = np.zeros((n_days, capacity, len(measures)), dtype=np.int32)
+                in_year = years == year
+                _accumulate(blocks[year], day_numbers[in_year] - year_start, region_codes[in_year],
+                            chunk[in_year], measures)
+
+        if first_day is None:
+            raise ValueError('no accident data')
+
+        # 연도 블록을 이어 붙여 첫 날부터 마지막 날까지의 날짜 축을 만듦 (데이터가 없는 연도는 0으로 채움)
+        first_year, last_year = _to_timestamp(first_day).year, _to_timestamp(last_day).year
+        values = np.concatenate([
+            blocks[year][:, :len(region_ids)] if year in blocks else
+            np.zeros((_year_span(year)[1], len(region_ids), len(measures)), dtype=np.int32)
+            for year in range(first_year, last_year + 1)])
+        offset = first_day - _year_span(first_year)[0]
+        regions = pd.MultiIndex.from_tuples(list(region_ids), names=['시도', '시군구'])
+        return cls._from_values(measures, first_day, regions, values[offset:offset + last_day - first_day + 1])
+
+    # 배열로 큐브 생성 (날짜 축은 start일부터 values의 길이만큼 이어짐)
+    @classmethod
+    def _from_values(cls, measures, start, regions, values, daily_totals=None):
+        cube = cls.__new__(cls)
+        cube.measures = list(measures)
+        cube.start = start
+        cube.dates = pd.date_range(_to_timestamp(start), periods=len(values), freq='D')
+        cube.regions = regions
+        cube.values = values
+        cube.daily_totals = values.sum(axis=1, dtype=np.int64) if daily_totals is None else daily_totals
+        return cube
+
+    # years 연도의 값을 other(그 연도들의 새 데이터로 만든 큐브)로 바꾼 새 큐브
+    # 나머지 연도의 값은 그대로 복사하고 self는 바꾸지 않으므로, self를 쓰고 있는 쪽은 계속 이전 값을 본다.
+    # 원본 행을 다시 읽는 것은 바뀐 연도뿐이고 나머지는 배열 복사이며, 새로 나온 시군구는 지역 축의 뒤에 추가된다.
+    def replace_years(self, other, years):
+        if other.measures != self.measures:
+            raise ValueError('measures do not match')
+        keep = np.flatnonzero(~self.dates.year.isin(list(years)))
+        kept_days = self.start + keep
+        other_days = other.start + np.arange(len(other.dates))
+        first_day = min(kept_days[0], other_days[0]) if len(keep) else other_days[0]
+        last_day = max(kept_days[-1], other_days[-1]) if len(keep) else other_days[-1]
+
+        regions = self.regions.append(other.regions.difference(self.regions, sort=False))
+        other_regions = regions.get_indexer(other.regions)
+
+        values = np.zeros((last_day - first_day + 1, len(regions), len(self.measures)), dtype=np.int32)
+        values[kept_days - first_day, :len(self.regions)] = self.values[keep]
+        values[(other_days - first_day)[:, None], other_regions] += other.values
+        daily_totals = np.zeros((len(values), len(self.measures)), dtype=np.int64)
+        daily_totals[kept_days - first_day] = self.daily_totals[keep]
+        daily_totals[other_days - first_day] += other.daily_totals
+        return self._from_values(self.measures, first_day, regions.set_names(['시도', '시군구']), values, daily_totals)
+
+    # 큐브를 파일 하나(.npz)로 저장 / 불러오기 (extra: 함께 저장할 배열, np.load로 따로 읽을 수 있음)
+    def save(self, path, **extra):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, values=self.values, daily_totals=self.daily_totals, start=np.int64(self.start),
+                     measures=np.array(self.measures),
+                     sido=np.array(self.regions.get_level_values('시도'), dtype=str),
+                     sigungu=np.array(self.regions.get_level_values('시군구'), dtype=str), **extra)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            regions = pd.MultiIndex.from_arrays([data['sido'], data['sigungu']], names=['시도', '시군구'])
+            return cls._from_values(data['measures'].tolist(), int(data['start']), regions,
+                                    data['values'], data['daily_totals'])
+
+    @property
+    def years(self):
+        return self.dates.year.unique().tolist()
+
+    # 날짜 목록을 날짜 축 위치로 변환 (데이터 범위를 벗어난 날짜는 제외)
+    def positions(self, dates):
+        dates = pd.DatetimeIndex(dates)
+        positions = (dates.values.astype('datetime64[D]').astype(np.int64) - self.start)
+        return positions[(positions >= 0) & (positions < len(self.dates))]
+
+    def measure_indices(self, measures):
+        measures = self.measures if measures is None else list(measures)
+        return measures, [self.measures.index(measure) for measure in measures]
+
+    # 날짜별 전국 합계
+    def daily(self, dates, measures=None):
+        measures, columns = self.measure_indices(measures)
+        positions = self.positions(dates)
+        return pd.DataFrame(self.daily_totals[np.ix_(positions, columns)],
+                            index=self.dates[positions], columns=measures)
+
+    # 특정 연도의 월별 전국 합계
+    def monthly_totals(self, year, measures=None):
+        daily = self.daily(pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D'), measures)
+        stats = daily.groupby(daily.index.month).sum()
+        stats.index.name = '발생월'
+        return stats.reset_index()
+
+
+# (날짜 위치, 지역 번호) 별로 항목 값을 values 배열에 더함
+def _accumulate(values, positions, region_codes, df, measures):
+    n_dates, n_regions = values.shape[:2]
+    flat_index = positions * n_regions + region_codes
+    for i, measure in enumerate(measures):
+        counts = np.bincount(flat_index, weights=df[measure].to_numpy(), minlength=n_dates * n_regions)
+        values[:, :, i] += counts.reshape(n_dates, n_regions).astype(np.int32)
+
+
+# 연, 월, 일 컬럼을 1970-01-01 기준 일수로 변환
+def _day_numbers(years, months, days):
+    dates = pd.to_datetime(pd.DataFrame({'year': years, 'month': months, 'day': days}))
+    return dates.values.astype('datetime64[D]').astype(np.int64)
+
+
+# 연도의 첫 날(1970-01-01 기준 일수)과 그 해의 일수
+def _year_span(year):
+    start, end = _day_numbers([year, year + 1], [1, 1], [1, 1])
+    return start, end - start
+
+
+def _to_timestamp(day_number):
+    return pd.Timestamp(np.datetime64(int(day_number), 'D'))
+
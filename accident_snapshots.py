@@ -0,0 +1,201 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from accident_cube import DailyAccidentCube
+from accident_store import (CACHE_DIR, DAILY_FILE_PATTERN, DEFAULT_MEMORY_BUDGET, discover_daily_files,
+                            iter_daily_chunks, year_from_path)
+from cache import file_key
+from event_windows import WINDOW_COLUMNS, window_stats
+
+# ----------------------------
+# 일자별 데이터의 증분 갱신과 버전별 스냅샷
+# ----------------------------
+
+# 새 연도 파일(또는 내용이 늘어난 올해 파일)은 패턴에 맞는 이름으로 넣기만 하면 된다.
+# DailyAccidentStore는 마지막 스냅샷(파일별 수정 시각과 크기, 큐브, 이벤트 기간별 통계)을 기억해 두고,
+# 새로 생기거나 바뀐 연도 파일만 읽어 그 연도의 큐브 값과 그 연도에 걸친 이벤트 기간의 통계만 다시 계산한다.
+# 스냅샷은 만든 뒤에는 바꾸지 않으며, 새 스냅샷이 준비되면 현재 스냅샷을 한 번에 바꾼다.
+# 따라서 rerun이 시작할 때 받은 스냅샷으로 그린 그래프들은 갱신 중에도 모두 같은 데이터를 본다.
+# 마지막 스냅샷의 큐브는 CACHE_DIR에 저장해 두어 서버를 다시 시작해도 바뀐 연도만 읽는다.
+
+# 큐브와 그 큐브를 만든 파일 목록을 한 파일에 저장 (여러 프로세스가 동시에 저장해도 짝이 맞음)
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'cube.npz')
+# 큐브 저장 형식이 바뀌면 올려서 저장된 큐브를 버림
+SNAPSHOT_VERSION = 1
+
+# 실행 중인 세션이 계속 볼 수 있도록 남겨 두는 최근 스냅샷 수
+SNAPSHOT_HISTORY = 4
+
+# 감시 스레드가 파일을 확인하는 간격 (초)
+WATCH_INTERVAL = 30
+
+SNAPSHOT_COLUMNS = ['버전', '연도', '다시 읽은 파일 수', '소요시간(초)', '만든 시각']
+
+logger = logging.getLogger(__name__)
+
+
+class DailySnapshot:
+    def __init__(self, version, files, cube, window_stats, changed, seconds):
+        self.version = version
+        # ((경로, 수정 시각, 크기), ...): 스냅샷의 키
+        self.files = files
+        self.cube = cube
+        # 이벤트 기간별 통계 (event_windows.window_stats의 결과)
+        self.window_stats = window_stats
+        # 이 스냅샷을 만들면서 다시 읽은 파일
+        self.changed = changed
+        self.seconds = seconds
+        self.created_at = pd.Timestamp.now()
+
+
+class DailyAccidentStore:
+    # make_windows(cube): 큐브의 이벤트 기간들을 반환하는 함수 (WINDOW_COLUMNS 데이터프레임)
+    def __init__(self, make_windows, measures=None, pattern=DAILY_FILE_PATTERN,
+                 memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.make_windows = make_windows
+        self.measures = measures
+        self.pattern = pattern
+        self.memory_budget = memory_budget
+        self._current = None
+        self._snapshots = OrderedDict()
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._watcher = None
+
+    # 현재 파일들의 (경로, 수정 시각, 크기)
+    def scan(self):
+        return file_key(*discover_daily_files(self.pattern))
+
+    # 가장 최근 스냅샷 (아직 없으면 만듦)
+    def current(self):
+        snapshot = self._current
+        return snapshot if snapshot is not None else self.refresh()
+
+    # files 키의 스냅샷 (SNAPSHOT_HISTORY보다 오래되어 지워진 스냅샷이면 KeyError)
+    # 다른 버전으로 바꿔 주면 한 rerun의 그래프들이 서로 다른 데이터를 보게 되므로, 호출한 쪽에서 current()로 다시 고정해야 함
+    def snapshot(self, files):
+        with self._lock:
+            snapshot = self._snapshots.get(files)
+        if snapshot is None:
+            raise KeyError('일자별 데이터 스냅샷이 기록에서 지워졌습니다.')
+        return snapshot
+
+    def has_snapshot(self, files):
+        with self._lock:
+            return files in self._snapshots
+
+    # 파일이 바뀌었으면 바뀐 연도만 반영한 새 스냅샷을 만들어 현재 스냅샷으로 바꿈
+    def refresh(self):
+        with self._refresh_lock:
+            files = self.scan()
+            previous = self._current or self._load_saved()
+            if previous is not None and previous.files == files:
+                snapshot = previous
+            else:
+                snapshot = self._build(previous, files)
+                self._save(snapshot)
+            if snapshot is not self._current:
+                self._publish(snapshot)
+            return snapshot
+
+    def _build(self, previous, files):
+        start = time.perf_counter()
+        paths = [path for path, _, _ in files]
+        old = {path: (mtime, size) for path, mtime, size in previous.files} if previous is not None else {}
+        changed = [path for path, mtime, size in files if old.get(path) != (mtime, size)]
+
+        # 처음 만들거나 파일이 없어진 경우에는 전체를 다시 읽음
+        if previous is None or set(old) - set(paths):
+            changed = paths
+            cube = DailyAccidentCube.from_chunks(iter_daily_chunks(paths, self.memory_budget))
+            stats = window_stats(cube, self.make_windows(cube), self.measures)
+        else:
+            years = [year_from_path(path) for path in changed]
+            update = DailyAccidentCube.from_chunks(iter_daily_chunks(changed, self.memory_budget),
+                                                   previous.cube.measures)
+            cube = previous.cube.replace_years(update, years)
+            stats = self._update_window_stats(previous.window_stats, cube, years)
+
+        snapshot = DailySnapshot(next(self._versions), files, cube, stats, changed, time.perf_counter() - start)
+        logger.info('일자별 데이터 스냅샷 %d: 파일 %d개 중 %d개 반영 (%.2f초)',
+                    snapshot.version, len(files), len(changed), snapshot.seconds)
+        return snapshot
+
+    # 바뀐 연도에 걸치는 기간과 새로 생긴 기간만 다시 계산하고, 나머지 기간은 이전 통계를 그대로 사용
+    def _update_window_stats(self, previous_stats, cube, years):
+        windows = self.make_windows(cube)
+        stale = np.zeros(len(windows), dtype=bool)
+        for year in years:
+            stale |= (windows['시작일'] <= pd.Timestamp(f'{year}-12-31')) & (windows['종료일'] >= pd.Timestamp(f'{year}-01-01'))
+        window_index = pd.MultiIndex.from_frame(windows[WINDOW_COLUMNS])
+        previous_index = pd.MultiIndex.from_frame(previous_stats[WINDOW_COLUMNS])
+        stale |= ~window_index.isin(previous_index)
+
+        reused = previous_stats[previous_index.isin(window_index[~stale])]
+        if not stale.any():
+            return reused.reset_index(drop=True)
+        updated = window_stats(cube, windows[stale], self.measures)
+        return pd.concat([reused, updated], ignore_index=True)
+
+    def _publish(self, snapshot):
+        with self._lock:
+            self._snapshots[snapshot.files] = snapshot
+            self._snapshots.move_to_end(snapshot.files)
+            while len(self._snapshots) > SNAPSHOT_HISTORY:
+                self._snapshots.popitem(last=False)
+            self._current = snapshot
+
+    def _save(self, snapshot):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        saved = json.dumps({'version': SNAPSHOT_VERSION, 'files': snapshot.files}, ensure_ascii=False)
+        snapshot.cube.save(SNAPSHOT_PATH, files=np.array(saved))
+
+    # 저장해 둔 마지막 스냅샷 (기간별 통계는 큐브에서 다시 계산)
+    def _load_saved(self):
+        if not os.path.exists(SNAPSHOT_PATH):
+            return None
+        try:
+            with np.load(SNAPSHOT_PATH) as data:
+                saved = json.loads(str(data['files']))
+            if saved.get('version') != SNAPSHOT_VERSION:
+                return None
+            cube = DailyAccidentCube.load(SNAPSHOT_PATH)
+        except (OSError, ValueError, KeyError):
+            logger.warning('저장된 일자별 큐브를 읽지 못해 전체를 다시 읽습니다.')
+            return None
+        files = tuple(tuple(entry) for entry in saved['files'])
+        stats = window_stats(cube, self.make_windows(cube), self.measures)
+        return DailySnapshot(next(self._versions), files, cube, stats, [], 0.0)
+
+    # 백그라운드 스레드에서 interval초마다 파일을 확인해 바뀌었으면 새 스냅샷을 만듦 (스토어마다 한 번만 시작)
+    def watch(self, interval=WATCH_INTERVAL):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name='daily-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception:  # 쓰는 중인 파일 등: 다음 확인 때 다시 시도
+                logger.exception('일자별 데이터 갱신 실패')
+
+    # 남아 있는 스냅샷 목록 (최근 것이 아래)
+    def history(self):
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        rows = [[snapshot.version, f'{snapshot.cube.years[0]}-{snapshot.cube.years[-1]}', len(snapshot.changed),
+                 round(snapshot.seconds, 3), snapshot.created_at.strftime('%H:%M:%S')] for snapshot in snapshots]
+        return pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS)
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# 연도 x 대상사고 구분 x 지역 x 항목 통계 큐브 (10_22_stt.csv)
+# ----------------------------
+
+# 10_22_stt.csv는 2010~2022년의 연도, 대상사고 구분(전체, 어린이사고, 노인사고 ...), 4자리 지역 코드별 통계이다.
+# 지역 코드는 앞 두 자리가 시도, 뒤 두 자리가 시군구이며, 뒤 두 자리가 00인 행은 그 시도의 합계이다.
+# (GeoJSON의 SIG_CD/CTPRVN_CD와는 다른 번호 체계이므로 시도 코드는 SIDO_CODES로 변환해서 지도에 사용한다.)
+# 불러올 때 한 번만 (연도, 구분, 지역, 항목) 배열로 바꾸고 시군구, 시도, 전국 단위의 연도 누적합을 미리 계산해 두므로,
+# 연도 범위, 구분, 항목을 바꿔 가며 조회해도 groupby 없이 배열 인덱싱과 뺄셈 한 번으로 결과를 얻는다.
+#
+# - 합산할 수 있는 건수 항목만 배열에 넣는다. 구성비, 인구/자동차 대비 사고건수는 합산할 수 없어 제외하고,
+#   치사율은 합산한 사망자수 / 사고건수로 다시 계산한다 (RATE_MEASURES).
+# - 법규위반, 사고유형 항목은 '전체' 구분에만 있으므로 값이 없는 칸은 0과 구분해서 NaN으로 반환한다.
+# - 시도 합계 행에는 따로 나오지 않는 시군구의 사고도 포함되어 있어 시도 단위는 파일의 합계 행을 우선 사용하고,
+#   합계 행이 없는 (연도, 구분)만 시군구 합계로 채운다.
+
+CODE_COLUMN = '법정동코드'
+CATEGORY_COLUMN = '대상사고 구분명'
+YEAR_COLUMN = '연도'
+
+MEASURE_COLUMNS = ['사고건수', '사망자수', '부상자수',
+                   '과속', '중앙선 침범', '신호위반', '안전거리 미확보', '안전운전 의무 불이행', '보행자 보호의무 위반', '기타',
+                   '차대사람', '차대차', '차량단독', '철길건널목']
+
+# 합산한 값으로 다시 계산하는 비율 항목: 이름 -> (분자, 분모, 배율)
+RATE_MEASURES = {'치사율': ('사망자수', '사고건수', 100)}
+
+# 통계 파일의 시도 코드(앞 두 자리) -> (법정구역 시도 코드 CTPRVN_CD, 시도명)
+SIDO_CODES = {
+    '11': ('11', '서울특별시'), '12': ('26', '부산광역시'), '13': ('41', '경기도'), '14': ('51', '강원특별자치도'),
+    '15': ('43', '충청북도'), '16': ('44', '충청남도'), '17': ('45', '전라북도'), '18': ('46', '전라남도'),
+    '19': ('47', '경상북도'), '20': ('48', '경상남도'), '21': ('50', '제주특별자치도'), '22': ('27', '대구광역시'),
+    '23': ('28', '인천광역시'), '24': ('29', '광주광역시'), '25': ('30', '대전광역시'), '26': ('31', '울산광역시'),
+    '27': ('36', '세종특별자치시'),
+}
+
+def read_accident_stats(path):
+    return pd.read_csv(path, encoding='euc-kr', dtype={CODE_COLUMN: str})
+
+
+class AccidentStatsCube:
+    def __init__(self, df, measures=MEASURE_COLUMNS):
+        self.measures = list(measures)
+        codes = df[CODE_COLUMN].str.zfill(4)
+        is_sido_total = codes.str.endswith('00').to_numpy()
+
+        self.years = sorted(int(year) for year in df[YEAR_COLUMN].unique())
+        self.categories = list(pd.unique(df[CATEGORY_COLUMN]))
+        self.districts = np.unique(codes[~is_sido_total].to_numpy(dtype=str))
+        self.sido = np.unique(codes.str[:2].to_numpy(dtype=str))
+
+        year_ids = np.searchsorted(self.years, df[YEAR_COLUMN].to_numpy())
+        category_ids = pd.Categorical(df[CATEGORY_COLUMN], categories=self.categories).codes
+        values = df[self.measures].to_numpy(dtype=float)
+
+        # 시군구 단위
+        rows = ~is_sido_total
+        district_ids = np.searchsorted(self.districts, codes[rows].to_numpy(dtype=str))
+        district_sums, district_counts = self._dense(year_ids[rows], category_ids[rows], district_ids,
+                                                     len(self.districts), values[rows])
+
+        # 시도 단위: 시군구 합계를 구한 뒤 파일의 시도 합계 행이 있는 칸은 그 값으로 교체
+        sido_sums, sido_counts = self._dense([], [], [], len(self.sido), values[:0])
+        sido_of_district = np.searchsorted(self.sido, self.districts.astype('U2'))
+        np.add.at(np.moveaxis(sido_sums, 2, 0), sido_of_district, np.moveaxis(district_sums, 2, 0))
+        np.add.at(np.moveaxis(sido_counts, 2, 0), sido_of_district, np.moveaxis(district_counts, 2, 0))
+
+        total_sums, total_counts = self._dense(year_ids[is_sido_total], category_ids[is_sido_total],
+                                               np.searchsorted(self.sido, codes[is_sido_total].str[:2].to_numpy(dtype=str)),
+                                               len(self.sido), values[is_sido_total])
+        reported = total_counts > 0
+        sido_sums[reported] = total_sums[reported]
+        sido_counts[reported] = total_counts[reported]
+
+        self._values = {
+            'district': (district_sums, district_counts),
+            'sido': (sido_sums, sido_counts),
+            'national': (sido_sums.sum(axis=2, keepdims=True), sido_counts.sum(axis=2, keepdims=True)),
+        }
+
+        # 연도 축 누적합 (연도 범위 [a, b)의 합계 = 누적합[b] - 누적합[a])
+        self._prefix = {level: tuple(np.concatenate([np.zeros_like(array[:1]), np.cumsum(array, axis=0)])
+                                     for array in arrays)
+                        for level, arrays in self._values.items()}
+
+    # (연도, 구분, 지역) 위치의 항목 값을 합계 배열과 값이 있는 행 수 배열로 변환 (NaN은 0으로 더하고 개수에서 제외)
+    def _dense(self, year_ids, category_ids, region_ids, n_regions, values):
+        shape = (len(self.years), len(self.categories), n_regions, len(self.measures))
+        sums = np.zeros(shape, dtype=np.int64)
+        counts = np.zeros(shape, dtype=np.int32)
+        present = ~np.isnan(values)
+        index = (np.asarray(year_ids, dtype=np.int64), np.asarray(category_ids, dtype=np.int64),
+                 np.asarray(region_ids, dtype=np.int64))
+        np.add.at(sums, index, np.where(present, values, 0).astype(np.int64))
+        np.add.at(counts, index, present.astype(np.int32))
+        return sums, counts
+
+    # 선택할 수 있는 항목 (건수 항목 + 비율 항목)
+    @property
+    def measure_options(self):
+        return self.measures + [name for name, (numerator, denominator, _) in RATE_MEASURES.items()
+                                if numerator in self.measures and denominator in self.measures]
+
+    # (시작 연도, 종료 연도) 포함 범위를 연도 축 구간 [a, b)로 변환 (None이면 전체 연도)
+    def _year_range(self, years):
+        if years is None:
+            return 0, len(self.years)
+        start, end = years
+        return int(np.searchsorted(self.years, start, side='left')), int(np.searchsorted(self.years, end, side='right'))
+
+    def _category_ids(self, categories):
+        if categories is None:
+            return list(self.categories), list(range(len(self.categories)))
+        categories = [categories] if isinstance(categories, str) else list(categories)
+        return categories, [self.categories.index(category) for category in categories]
+
+    # 요청한 항목과 그 계산에 필요한 건수 항목의 배열 위치
+    def _measure_ids(self, measures):
+        measures = self.measure_options if measures is None else list(measures)
+        columns = []
+        for measure in measures:
+            columns.extend(RATE_MEASURES[measure][:2] if measure in RATE_MEASURES else [measure])
+        columns = list(dict.fromkeys(columns))
+        return measures, columns, [self.measures.index(column) for column in columns]
+
+    # 합계 배열(마지막 축이 columns)에 값이 없는 칸을 NaN으로 바꾸고 비율 항목을 계산해 데이터프레임으로
+    def _frame(self, sums, counts, measures, columns):
+        values = np.where(counts > 0, sums, np.nan)
+        frame = pd.DataFrame(values.reshape(-1, len(columns)), columns=columns)
+        for measure in measures:
+            if measure in RATE_MEASURES:
+                numerator, denominator, scale = RATE_MEASURES[measure]
+                frame[measure] = (frame[numerator] / frame[denominator].where(frame[denominator] > 0) * scale).round(2)
+        return frame[measures]
+
+    def _region_columns(self, level, region_ids):
+        if level == 'district':
+            codes = self.districts[region_ids]
+            return {CODE_COLUMN: codes, '시도': codes.astype('U2')}
+        if level == 'sido':
+            codes = self.sido[region_ids]
+            return {'시도': codes,
+                    '시도코드': [SIDO_CODES.get(code, (None, None))[0] for code in codes],
+                    '시도명': [SIDO_CODES.get(code, (None, None))[1] for code in codes]}
+        return {}
+
+    # 지역별 합계 (연도 범위 전체를 더한 값, 한 구분) -> 지역마다 한 행 (Choropleth, 순위표용)
+    # level: 'district'(법정동코드), 'sido'(시도, 시도코드, 시도명), 'national'(한 행)
+    # 선택한 항목이 모두 없는 지역은 제외한다.
+    def totals(self, level='sido', years=None, category='전체', measures=None):
+        sums, counts = self._prefix[level]
+        start, end = self._year_range(years)
+        category_id = self.categories.index(category)
+        measures, columns, column_ids = self._measure_ids(measures)
+
+        region_sums = sums[end, category_id][:, column_ids] - sums[start, category_id][:, column_ids]
+        region_counts = counts[end, category_id][:, column_ids] - counts[start, category_id][:, column_ids]
+        frame = self._frame(region_sums, region_counts, measures, columns)
+
+        for i, (name, values) in enumerate(self._region_columns(level, np.arange(len(frame))).items()):
+            frame.insert(i, name, values)
+        return frame[frame[measures].notna().any(axis=1)].reset_index(drop=True)
+
+    # 연도별 값 (구분, 지역별) -> (연도, 대상사고 구분명, 지역 ...) 마다 한 행 (꺾은선 그래프용)
+    # categories는 구분 하나 또는 목록, codes는 level의 지역 코드 목록(None이면 모든 지역)
+    def trend(self, level='national', years=None, categories='전체', measures=None, codes=None):
+        sums, counts = self._values[level]
+        start, end = self._year_range(years)
+        categories, category_ids = self._category_ids(categories)
+        measures, columns, column_ids = self._measure_ids(measures)
+        region_ids = np.arange(sums.shape[2]) if codes is None else \
+            np.searchsorted(self.districts if level == 'district' else self.sido, list(codes))
+
+        selection = np.ix_(np.arange(start, end), category_ids, region_ids, column_ids)
+        frame = self._frame(sums[selection], counts[selection], measures, columns)
+
+        year_index, category_index, region_index = (axis.ravel() for axis in np.meshgrid(
+            np.arange(start, end), np.arange(len(category_ids)), np.arange(len(region_ids)), indexing='ij'))
+        keys = {YEAR_COLUMN: np.asarray(self.years)[year_index],
+                CATEGORY_COLUMN: np.asarray(categories, dtype=object)[category_index]}
+        keys.update({name: np.asarray(values, dtype=object)[region_index]
+                     for name, values in self._region_columns(level, region_ids).items()})
+        for i, (name, values) in enumerate(keys.items()):
+            frame.insert(i, name, values)
+        return frame
@@ -0,0 +1,182 @@
+import glob
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from parallel_loader import default_workers, load_in_parallel
+
+# ----------------------------
+# 일자별 시군구별 교통사고 데이터 컬럼형 캐시
+# ----------------------------
+
+# 변환된 Parquet 파일과 manifest가 저장되는 위치
+CACHE_DIR = os.path.join('.cache', 'daily')
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'manifest.json')
+# Parquet 저장 형식이 바뀌면 올려서 예전 캐시를 다시 변환하게 함
+CACHE_VERSION = 2
+
+# 연도별 원본 CSV 파일 패턴 (새 연도의 파일을 추가하면 자동으로 포함됨)
+DAILY_FILE_PATTERN = os.path.join('교통사고 데이터', '도로교통공단_일자별 시군구별 교통사고 건수(*).csv')
+
+# 원본 CSV 컬럼별 저장 타입 (날짜 정보와 건수는 작은 정수, 지역명은 categorical)
+# 일자별 시군구별 건수는 수십 건 수준이므로 int16으로 충분하다.
+MEASURE_COLUMNS = ['사고건수', '사망자수', '중상자수', '경상자수', '부상신고자수']
+COLUMN_DTYPES = {
+    '발생월': 'int8',
+    '발생일': 'int8',
+    '시도': 'category',
+    '시군구': 'category',
+    **{column: 'int16' for column in MEASURE_COLUMNS},
+}
+
+# Parquet 파일 스키마 (지역명은 사전(dictionary) 인코딩으로 저장되고 읽을 때 categorical로 복원)
+PARQUET_SCHEMA = pa.schema([
+    ('발생월', pa.int8()),
+    ('발생일', pa.int8()),
+    ('시도', pa.string()),
+    ('시군구', pa.string()),
+    *[(column, pa.int16()) for column in MEASURE_COLUMNS],
+    ('발생년도', pa.int16()),
+])
+
+# 한 번에 메모리에 올리는 데이터의 기본 상한 (바이트)
+DEFAULT_MEMORY_BUDGET = 64 * 2 ** 20
+# CSV 한 행을 읽을 때 필요한 메모리 추정치 (파서 버퍼 포함, 실측 약 150바이트에 여유를 둠)
+BYTES_PER_ROW = 200
+
+
+# 파일명에서 연도 추출 (예: '...건수(2016).csv' -> 2016)
+def year_from_path(file_path):
+    return int(re.findall(r'\d{4}', os.path.basename(file_path))[-1])
+
+
+# 패턴에 맞는 연도별 파일을 연도 순으로 반환
+def discover_daily_files(pattern=DAILY_FILE_PATTERN):
+    return sorted(glob.glob(pattern), key=year_from_path)
+
+
+# 메모리 상한에 맞는 청크 행 수
+def chunk_rows_for(memory_budget=DEFAULT_MEMORY_BUDGET):
+    return max(1000, int(memory_budget // BYTES_PER_ROW))
+
+
+# 파일 크기와 수정 시각으로 원본 파일의 지문 생성
+def _file_stat(file_path):
+    stat = os.stat(file_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _file_hash(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+# 캐시가 원본과 일치하는지 확인
+# 수정 시각만 바뀌고 내용이 같으면(예: touch, git checkout) 해시로 확인 후 재사용
+def _is_fresh(entry, file_path):
+    if entry is None or entry.get('version') != CACHE_VERSION or not os.path.exists(entry['parquet']):
+        return False
+    stat = _file_stat(file_path)
+    if stat['size'] != entry['size']:
+        return False
+    if stat['mtime_ns'] == entry['mtime_ns']:
+        return True
+    if _file_hash(file_path) != entry['sha1']:
+        return False
+    entry['mtime_ns'] = stat['mtime_ns']
+    return True
+
+
+# euc-kr CSV 한 개를 chunk_rows 행씩 읽어 타입이 지정된 데이터프레임으로 하나씩 반환
+# 청크마다 바로 작은 타입으로 읽으므로 문자열(object) 컬럼 전체가 메모리에 올라가지 않는다.
+def iter_csv_chunks(file_path, chunk_rows):
+    year = year_from_path(file_path)
+    with pd.read_csv(file_path, encoding='euc-kr', dtype=COLUMN_DTYPES, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            chunk['발생년도'] = pd.Series(year, index=chunk.index, dtype='int16')
+            yield chunk
+
+
+# CSV를 청크 단위로 읽으면서 Parquet 파일에 이어 씀 (메모리에는 청크 하나만 있음)
+def _write_parquet(file_path, parquet_path, chunk_rows):
+    tmp_path = parquet_path + '.tmp'
+    with pq.ParquetWriter(tmp_path, PARQUET_SCHEMA) as writer:
+        for chunk in iter_csv_chunks(file_path, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk.astype({'시도': str, '시군구': str}),
+                                                    schema=PARQUET_SCHEMA, preserve_index=False))
+    os.replace(tmp_path, parquet_path)
+
+
+# CSV 한 개를 Parquet으로 변환하고 manifest 항목을 반환 (워커 프로세스에서 실행될 수 있음)
+def _convert_file(file_path, chunk_rows):
+    parquet_path = os.path.join(CACHE_DIR, f'{year_from_path(file_path)}.parquet')
+    _write_parquet(file_path, parquet_path, chunk_rows)
+    return {
+        **_file_stat(file_path),
+        'sha1': _file_hash(file_path),
+        'parquet': parquet_path,
+        'version': CACHE_VERSION,
+    }
+
+
+# 연도별 CSV를 Parquet으로 변환 (원본이 바뀐 연도만 다시 변환)
+# 바뀐 연도가 여러 개면 프로세스 풀로 동시에 변환하고, 메모리 상한은 워커 수로 나누어 각 워커에 적용한다.
+# manifest는 모든 변환이 끝난 뒤 현재 프로세스에서 한 번만 기록한다.
+def build_daily_cache(file_paths, memory_budget=DEFAULT_MEMORY_BUDGET, max_workers=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    manifest = _load_manifest()
+    changed = False
+
+    stale_paths = []
+    for file_path in file_paths:
+        entry = manifest.get(file_path)
+        old_mtime = entry and entry['mtime_ns']
+        if _is_fresh(entry, file_path):
+            changed = changed or entry['mtime_ns'] != old_mtime
+        else:
+            stale_paths.append(file_path)
+
+    if stale_paths:
+        workers = min(len(stale_paths), max_workers or default_workers())
+        entries = load_in_parallel(_convert_file, stale_paths, chunk_rows_for(memory_budget // workers),
+                                   max_workers=workers)
+        manifest.update(zip(stale_paths, entries))
+        changed = True
+
+    if changed:
+        _save_manifest(manifest)
+    return [manifest[file_path]['parquet'] for file_path in file_paths]
+
+
+# 여러 연도의 데이터를 메모리 상한 안의 청크로 나누어 하나씩 반환하는 제너레이터
+# 호출하는 쪽에서 청크를 집계 테이블(DailyAccidentCube.from_chunks 등)에 바로 더해 나가면
+# 연도 수와 관계없이 원본 행 전체가 한꺼번에 메모리에 올라가지 않는다.
+def iter_daily_chunks(file_paths, memory_budget=DEFAULT_MEMORY_BUDGET, max_workers=None):
+    parquet_paths = build_daily_cache(file_paths, memory_budget, max_workers)
+    chunk_rows = chunk_rows_for(memory_budget)
+    for path in parquet_paths:
+        parquet_file = pq.ParquetFile(path, read_dictionary=['시도', '시군구'])
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
@@ -1,54 +1,162 @@
 import folium
-from folium.plugins import HeatMap
 import streamlit as st
 import pandas as pd
 import branca.colormap as cm
 from matplotlib import rc
 import matplotlib.pyplot as plt
 import plotly.express as px
-import json
+import os
+import numpy as np
 import plotly.graph_objects as go
 
+from accident_snapshots import SNAPSHOT_HISTORY, DailyAccidentStore
+from accident_stats import RATE_MEASURES, AccidentStatsCube, read_accident_stats
+from accident_store import DAILY_FILE_PATTERN
+from cache import file_key, memoize
+from event_windows import compare_with_baseline, complete_windows, windows_from_dates, windows_from_ranges
+from geo_tiles import GeoTiles
+from heat_tiles import TiledHeatMap, build_heat_tiles, load_heat_index, static_tile_url
+from hotspot_polygons import parse_polygons, to_feature_collection
+from hotspot_ranking import RankingIndex
+from parallel_loader import load_in_parallel, load_timings
+from prebuilt import prebuilt_figure
+from profiling import chrome_trace, finish_run, log_lines, recent_runs, render, runs_frame, section, start_run
+from spatial_index import OUTSIDE, load_region_names, load_spatial_index
+from warmup import start_warmup, warmup_status
+from weekday_hour import read_weekday_hour_xls, weekday_hour_table
+
 # 한글 폰트 설정
 rc('font', family='NanumGothic')
 plt.rcParams['axes.unicode_minus'] = False
 
+# 성능 측정 (관리자용)
+# 주소 뒤에 ?profile=1 을 붙여 접속하면 rerun마다 섹션, 캐시된 함수, 화면 요소별 소요 시간과 캐시 적중 여부를 기록하고
+# 사이드바에 측정 결과 패널과 파일별 불러오기 시간, 백그라운드 작업, 스냅샷 기록 패널을 표시합니다.
+profiling_enabled = st.query_params.get('profile') == '1'
+start_run(profiling_enabled)
+
+# 점진적 표시
+# Q1 아래의 섹션은 데이터를 백그라운드 스레드에서 미리 불러오고(warmup.py), 준비되기 전에는 자리 표시만 보여 줍니다.
+# 자리 표시는 LAZY_POLL_SECONDS마다 자기 부분만 다시 실행해 작업 상태를 확인하고, 준비되면 앱을 다시 실행해 섹션을 그립니다.
+# (데이터는 캐시에 남으므로 다음 rerun과 다른 세션에서는 바로 그려집니다.)
+LAZY_POLL_SECONDS = 1.0
+
+def lazy_section(job, draw):
+    # Streamlit 서버 없이 실행할 때(benchmark.py, static_export.py)는 나눠 보여 줄 화면이 없으므로 기다렸다가 그림
+    if not job.done() and not st.runtime.exists():
+        job.wait()
+    if job.done():
+        draw()
+        return
+
+    @st.fragment(run_every=LAZY_POLL_SECONDS)
+    def wait_for_job():
+        if job.done():
+            st.rerun()
+        st.info(f'{job.name}를 불러오는 중입니다. 준비되면 자동으로 표시됩니다.')
+
+    wait_for_job()
+
 # ----------------------------
 # 데이터 불러오기 및 전처리
 # ----------------------------
 
-# 교통사고 다발 지역 데이터 불러오기
-df = pd.read_csv('교통사고 데이터/전국교통사고다발지역표준데이터.csv', encoding='euc-kr')
-drop_list = ['데이터기준일자', '제공기관코드', '제공기관명']
-df = df.drop(columns=drop_list)
-
-# 사고건수 기준으로 데이터 내림차순 정렬 (표에 반영)
-df_sorted = df.sort_values(by='사고건수', ascending=False)
-
-# '위치코드'의 앞 5자리 숫자로 그룹화하고 사고건수를 합산 (지도에 반영)
-df['위치코드_시군구'] = df['위치코드'].astype(str).str[:5]  # 위치코드에서 첫 5자리 추출
-df_grouped = df.groupby('위치코드_시군구', as_index=False)['사고건수'].sum()  # 사고건수 합산
+# 아래 함수들의 결과는 cache.py의 프로세스 공유 캐시에 저장되어 rerun/세션 간에 재사용됩니다.
+# 캐시 키에는 원본 파일의 수정 시각이 포함되므로 파일이 바뀌면 자동으로 다시 계산됩니다.
+# 파일이 바뀔 때마다 이전 버전의 결과가 쌓이지 않도록 파일 단위 캐시는 원본 파일 하나당 FILE_CACHE_SIZE개까지만 보관합니다.
+# (갱신 직후 이전 버전으로 그리던 rerun이 끝날 때까지 이전 결과 하나를 남겨 둠)
+FILE_CACHE_SIZE = 2
+# @prebuilt_figure가 붙은 그래프는 static_export.py로 만든 번들(dist)에 같은 입력으로 그린 Figure가 있으면 그것을 불러옵니다.
+HOTSPOT_PATH = '교통사고 데이터/전국교통사고다발지역표준데이터.csv'
+GEOJSON_PATH = '법정구역 GeoJSON 데이터_23년8월/법정구역_시군구.geojson'
+SIDO_GEOJSON_PATH = '법정구역 GeoJSON 데이터_23년8월/법정구역_시도_simplified.geojson'
 
-# 법정구역 GeoJSON 파일 불러오기
-with open('법정구역 GeoJSON 데이터_23년8월/법정구역_시군구.geojson', 'r', encoding='utf-8') as f:
-    geojson = json.load(f)
+# 교통사고 다발 지역 데이터 불러오기
+@memoize('hotspots', maxsize=FILE_CACHE_SIZE, key=file_key)
+def load_hotspots(path):
+    df = pd.read_csv(path, encoding='euc-kr')
+    drop_list = ['데이터기준일자', '제공기관코드', '제공기관명']
+    df = df.drop(columns=drop_list)
+    df['위치코드_시군구'] = df['위치코드'].astype(str).str[:5]  # 위치코드에서 첫 5자리 추출
+    df['시도명'] = df['사고지역위치명'].str.split(n=1).str[0].astype('category')  # 사고지역위치명의 첫 단어(시도) 추출 (경계 밖 좌표에만 사용)
+    return df
+
+# 법정구역 경계의 공간 인덱스 (처음 한 번만 .cache/spatial에 생성, 경계 파일이 바뀌면 다시 생성)
+@memoize('spatial_index', maxsize=2 * FILE_CACHE_SIZE, key=lambda path, id_property: (file_key(path), id_property))
+def load_district_index(path, id_property):
+    return load_spatial_index(path, id_property)
+
+# 다발지역의 위도/경도가 실제로 속한 시군구, 시도 코드 (공간 조인)
+# 위치코드 앞 5자리가 현재 경계(2023년 8월)의 SIG_CD와 맞지 않는 지역도 위치로 현재 시군구에 배정하고,
+# 어느 경계에도 속하지 않는 좌표만 위치코드 기준 코드를 그대로 사용한다.
+# 시도명도 위치 기준 시도코드의 현재 경계 이름(CTP_KOR_NM)으로 바꾸며, 시도 선택과 시도별 지도, 표, 히트맵은 모두 이 시도명으로 나뉜다.
+@memoize('hotspot_districts', maxsize=FILE_CACHE_SIZE, key=file_key)
+def locate_hotspots(path, geojson_path, sido_geojson_path):
+    df = load_hotspots(path)
+    sigungu_index, sigungu_codes = load_district_index(geojson_path, 'SIG_CD')
+    sido_index, sido_codes = load_district_index(sido_geojson_path, 'CTPRVN_CD')
+
+    sigungu_ids = sigungu_index.query(df['경도'], df['위도'])
+    sido_ids = sido_index.query(df['경도'], df['위도'])
+    located = df.copy()
+    located['시군구코드'] = np.where(sigungu_ids != OUTSIDE, sigungu_codes[sigungu_ids], df['위치코드_시군구'])
+    located['시도코드'] = np.where(sido_ids != OUTSIDE, sido_codes[sido_ids], df['위치코드_시군구'].str[:2])
+    sido_names = load_region_names(sido_geojson_path, 'CTPRVN_CD', 'CTP_KOR_NM')
+    located['시도명'] = located['시도코드'].map(sido_names).fillna(df['시도명'].astype(str)).astype('category')
+
+    # 위치코드 기준 배정과 위치 기준 배정 비교
+    located['배정결과'] = np.select(
+        [sigungu_ids == OUTSIDE,
+         ~df['위치코드_시군구'].isin(sigungu_codes),
+         located['시군구코드'] != df['위치코드_시군구']],
+        ['경계 밖 좌표', '현재 경계에 없는 위치코드', '위치코드와 다른 시군구'],
+        default='일치')
+    return located
+
+# 위치 기준 시군구코드별 사고건수 합산(지도에 반영)
+@memoize('hotspot_aggregates', maxsize=FILE_CACHE_SIZE, key=file_key)
+def summarize_hotspots(path, geojson_path, sido_geojson_path):
+    df = locate_hotspots(path, geojson_path, sido_geojson_path)
+    return df.groupby('시군구코드', as_index=False)['사고건수'].sum()  # 사고건수 합산
+
+# 사고건수 순위 인덱스 (불러올 때 한 번만 정렬, 표는 미리 잘라 둔 Top N을 그대로 사용)
+# - hotspot_ranking: 다발 지역 전국 순위와 시도별 순위 (시도 선택, 시도별 Top10, 시도별 지도에 사용)
+# - district_ranking: 시군구별 합산 사고건수 순위
+@memoize('hotspot_ranking', maxsize=FILE_CACHE_SIZE, key=file_key)
+def load_hotspot_ranking(path, geojson_path, sido_geojson_path):
+    hotspot_ranking = RankingIndex(locate_hotspots(path, geojson_path, sido_geojson_path), '사고건수', '시도명', top_k=20)
+    district_ranking = RankingIndex(summarize_hotspots(path, geojson_path, sido_geojson_path), '사고건수', top_k=20)
+    return hotspot_ranking, district_ranking
+
+# 법정구역 GeoJSON 파일을 시도별로 나누고 단순화한 타일 불러오기 (처음 한 번만 .cache/geo에 생성)
+@memoize('geo_tiles', maxsize=2 * FILE_CACHE_SIZE, key=lambda path, id_property='SIG_CD': (file_key(path), id_property))
+def load_geo_tiles(path, id_property='SIG_CD'):
+    return GeoTiles(path, id_property)
+
+section('Q1. 교통사고 다발 지역')
 
 # Choropleth 생성 함수 정의
-def make_choropleth(df, geojson, location_code_column, value_column, color_theme):
+# 시도 경계처럼 SIG_CD가 아닌 속성으로 지역을 찾을 때는 featureidkey를, 사고건수가 아닌 항목은 label을 지정
+def make_choropleth(df, geojson, location_code_column, value_column, color_theme,
+                    featureidkey="properties.SIG_CD", label='사고건수', colorbar_title='누적 사고건수'):
+    # GeoJSON 대신 GeoTiles가 주어지면 색칠할 지역을 그리는 데 필요한 가장 작은 도형만 사용
+    if isinstance(geojson, GeoTiles):
+        geojson = geojson.for_codes(df[location_code_column])
+
     # Choropleth 생성
     choropleth = px.choropleth(df,
                                geojson=geojson,
                                locations=location_code_column,
-                               featureidkey="properties.SIG_CD",
+                               featureidkey=featureidkey,
                                color=value_column,
                                color_continuous_scale=color_theme,
-                               labels={value_column: '사고건수'},
+                               labels={value_column: label},
                                template='simple_white'  # Use a clean template
                               )
     choropleth.update_geos(fitbounds="locations", visible=False)
     choropleth.update_layout(
         coloraxis_colorbar={
-            'title': '누적 사고건수',
+            'title': colorbar_title,
             'tickvals': [df[value_column].min(), df[value_column].max()],
             'ticktext': [f'{df[value_column].min()}', f'{df[value_column].max()}'],  # Display numeric values
         },
@@ -60,8 +168,12 @@ def make_choropleth(df, geojson, location_code_column, value_column, color_theme
     )
     return choropleth
 
-# Choropleth 지도 생성
-choropleth_map = make_choropleth(df_grouped, geojson, '위치코드_시군구', '사고건수', 'Blues')  # Use the "Blues" color scale
+# 전국 Choropleth 지도 생성 (입력 파일이 같으면 만들어 둔 Figure를 재사용)
+@memoize('figures', maxsize=64, key=lambda path, geojson_path, sido_geojson_path: ('national_choropleth', file_key(path, geojson_path, sido_geojson_path)))
+@prebuilt_figure
+def national_choropleth(path, geojson_path, sido_geojson_path):
+    df_grouped = summarize_hotspots(path, geojson_path, sido_geojson_path)
+    return make_choropleth(df_grouped, load_geo_tiles(geojson_path), '시군구코드', '사고건수', 'Blues')  # Use the "Blues" color scale
 
 # ----------------------------
 # Streamlit 앱 구성
@@ -71,189 +183,267 @@ st.title('초보운전, 언제가 가장 안전할까?')
 st.markdown('### <span style="color:#4169e1">Q1. 전국에서 교통사고가 많이 발생하는 지역은 어디일까?</span>', unsafe_allow_html=True)
 st.markdown('#### 1. 전국 교통사고 다발 지역 시각화 (2012-2021)')
 
-# Choropleth 지도 표시
-st.plotly_chart(choropleth_map)
+# Choropleth 지도 표시 (첫 화면: 시군구별 합계만으로 그리고, 순위 인덱스 등 나머지 Q1 데이터는 지도를 보낸 뒤에 불러옴)
+choropleth_map = national_choropleth(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH)
+render('전국 Choropleth 지도', st.plotly_chart, choropleth_map)
+
+hotspot_ranking, district_ranking = load_hotspot_ranking(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH)
 
 # 가운데 정렬을 위한 스타일 지정
 def center_align(s):
     return ['text-align: center'] * len(s)
 
+# 머리글 배경색과 가운데 정렬을 적용한 표
+def style_table(df):
+    return df.style.set_table_styles(
+        [{'selector': 'th', 
+          'props': [('background-color', '#D3D3D3'), ('font-weight', 'bold'), ('text-align', 'center')]}]
+    ).apply(center_align, axis=0)
+
 # 첫 번째 표: 사고지역위치명을 기준으로 한 사고건수 Top 20
-styled_table_location = df_sorted[['사고지역위치명', '사고건수']].head(20).style.set_table_styles(
-    [{'selector': 'th', 
-      'props': [('background-color', '#D3D3D3'), ('font-weight', 'bold'), ('text-align', 'center')]}]
-).apply(center_align, axis=0)
+styled_table_location = style_table(hotspot_ranking.top(20)[['사고지역위치명', '사고건수']])
 
 # 전국 사고건수 기준 내림차순으로 정렬된 사고지역위치명 상위 20개 표시
 st.markdown("##### ⦁ 사고지역위치명으로 합산한 사고 다발 지역 (전국 Top20)")
-st.table(styled_table_location)
+render('전국 사고 다발 지역 Top20', st.table, styled_table_location)
 
-# 두 번째 표: '위치코드'의 앞 5자리 숫자로 그룹화한 후 사고건수를 합산한 것의 Top 20
-df_grouped_sorted = df_grouped.sort_values(by='사고건수', ascending=False)
-styled_table_code = df_grouped_sorted.head(20).style.set_table_styles(
-    [{'selector': 'th', 
-      'props': [('background-color', '#D3D3D3'), ('font-weight', 'bold'), ('text-align', 'center')]}]
-).apply(center_align, axis=0)
+# 두 번째 표: 위치 기준 시군구코드로 그룹화한 후 사고건수를 합산한 것의 Top 20
+styled_table_code = style_table(district_ranking.top(20))
 
-# '위치코드' 앞 5자리 기준으로 그룹화한 후 사고건수 상위 20개 표시
+# 시군구코드 기준으로 그룹화한 후 사고건수 상위 20개 표시
 st.markdown("##### ⦁ 시군구 기준으로 합산한 사고 다발 지역 (전국 Top20)")
-st.table(styled_table_code)
-
-# 시도별 사고 다발 지역 선택
-sido_list = df['사고지역위치명'].apply(lambda x: x.split()[0]).unique()
+render('시군구별 사고 다발 지역 Top20', st.table, styled_table_code)
+
+# 사고 다발 지역 히트맵 (folium.plugins.HeatMap 대신 미리 합산한 타일 피라미드를 화면에 보이는 만큼만 불러옴)
+# 타일은 static/heat에 한 번만 만들어지고, Streamlit 정적 파일 서빙(.streamlit/config.toml)이 /app/static/heat 주소로 제공합니다.
+# 시도를 지정하면 시도 선택, 시도별 지도와 같은 위치 기준 시도의 다발 지역만 사용
+@memoize('heat_tiles', maxsize=32, key=lambda path, geojson_path, sido_geojson_path, sido=None: (file_key(path, geojson_path, sido_geojson_path), sido))
+def load_heat_tiles(path, geojson_path, sido_geojson_path, sido=None):
+    if sido is None:
+        df = load_hotspots(path)
+    else:
+        hotspot_ranking, _ = load_hotspot_ranking(path, geojson_path, sido_geojson_path)
+        df = hotspot_ranking.group_rows(sido)
+    return build_heat_tiles(df['위도'], df['경도'], df['사고건수'])
+
+# tile_base_url을 지정하면 앱 서버의 정적 파일 주소 대신 그 주소(정적 번들에서는 HTML 파일 기준 상대 경로) 아래의 타일을 사용
+@memoize('figures', maxsize=64, key=lambda path, geojson_path, sido_geojson_path, sido=None, zoom_start=7, tile_base_url=None: ('heatmap', file_key(path, geojson_path, sido_geojson_path), sido, zoom_start, tile_base_url))
+def heatmap_html(path, geojson_path, sido_geojson_path, sido=None, zoom_start=7, tile_base_url=None):
+    tile_dir = load_heat_tiles(path, geojson_path, sido_geojson_path, sido)
+    index = load_heat_index(tile_dir)
+    tile_url = f"{tile_base_url or static_tile_url(st.get_option('server.baseUrlPath'))}/{os.path.basename(tile_dir)}"
+
+    df = load_hotspots(path)
+    heatmap = folium.Map(location=index['center'] or [36.5, 127.8], zoom_start=zoom_start)
+    TiledHeatMap(tile_url, index, radius=15, blur=25).add_to(heatmap)
+    cm.LinearColormap(['yellow', 'orange', 'red'], vmin=df['사고건수'].min(), vmax=df['사고건수'].max(),
+                      caption='사고건수').add_to(heatmap)
+    return heatmap.get_root().render()
+
+st.markdown("##### ⦁ 전국 교통사고 다발 지역 히트맵")
+render('전국 히트맵', st.iframe, heatmap_html(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH), height=500)
+
+# 위치코드 앞 5자리 기준 배정과 위도/경도 기준 배정 비교
+@memoize('hotspot_district_report', maxsize=FILE_CACHE_SIZE, key=file_key)
+def district_match_report(path, geojson_path, sido_geojson_path):
+    df = locate_hotspots(path, geojson_path, sido_geojson_path)
+    report = df.groupby('배정결과', as_index=False).agg(지역수=('사고건수', 'size'), 사고건수=('사고건수', 'sum'))
+    mismatched = df[df['배정결과'] != '일치'][['사고지역위치명', '위치코드_시군구', '시군구코드', '배정결과', '사고건수']]
+    return report, mismatched.sort_values(by='사고건수', ascending=False)
+
+district_report, district_mismatched = district_match_report(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH)
+with st.expander('위치코드 기준과 위치(위도/경도) 기준 시군구 배정 비교'):
+    render('시군구 배정 비교', st.dataframe, district_report, hide_index=True)
+    render('시군구 배정이 다른 지역', st.dataframe, district_mismatched.head(100), hide_index=True)
+
+# 시도별 사고 다발 지역 선택 (순위 인덱스의 시도 목록, 데이터에 처음 나온 순서)
+sido_list = hotspot_ranking.groups
 selected_sido = st.selectbox("시도를 선택하세요", options=sido_list)
 
-# 선택한 시도에 해당하는 데이터 필터링
-df_sido = df[df['사고지역위치명'].str.contains(selected_sido)]
+# 선택한 시도의 정렬된 데이터와 시군구별 합산 결과 (최근 조회한 시도만 LRU로 보관)
+@memoize('sido_hotspots', maxsize=8, key=lambda path, geojson_path, sido_geojson_path, sido: (file_key(path, geojson_path, sido_geojson_path), sido))
+def summarize_sido_hotspots(path, geojson_path, sido_geojson_path, sido):
+    hotspot_ranking, _ = load_hotspot_ranking(path, geojson_path, sido_geojson_path)
+
+    # 선택한 시도에 해당하는 데이터 (순위 인덱스에서 사고건수 내림차순으로 정렬된 구간을 그대로 가져옴)
+    df_sorted_sido = hotspot_ranking.group_rows(sido)
 
-# 사고건수 기준으로 데이터 내림차순 정렬 (표에 반영)
-df_sorted_sido = df_sido.sort_values(by='사고건수', ascending=False)
+    # 위치 기준 시군구코드로 그룹화하고 사고건수를 합산 (해당 시도의 지도에 반영)
+    df_grouped_sido = df_sorted_sido.groupby('시군구코드', as_index=False).agg({
+        '사고건수': 'sum',
+        '위도': 'mean',  # 중심 위치를 위한 위도 평균
+        '경도': 'mean'   # 중심 위치를 위한 경도 평균
+    })
+    return df_sorted_sido, df_grouped_sido
 
-# '위치코드'의 앞 5자리 숫자로 그룹화하고 사고건수를 합산 (해당 시도의 지도에 반영)
-df_sido['위치코드_시군구'] = df_sido['위치코드'].astype(str).str[:5]  # 위치코드에서 첫 5자리 추출
-df_grouped_sido = df_sido.groupby('위치코드_시군구', as_index=False).agg({
-    '사고건수': 'sum',
-    '위도': 'mean',  # 중심 위치를 위한 위도 평균
-    '경도': 'mean'   # 중심 위치를 위한 경도 평균
-})
+df_sorted_sido, df_grouped_sido = summarize_sido_hotspots(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH, selected_sido)
+
+# 사고 다발 지역 폴리곤 ('사고다발지역폴리곤정보' 컬럼 전체를 한 번에 파싱)
+@memoize('hotspot_polygons', maxsize=FILE_CACHE_SIZE, key=file_key)
+def load_hotspot_polygons(path):
+    return parse_polygons(load_hotspots(path)['사고다발지역폴리곤정보'])
 
 # 선택된 시도의 Choropleth 지도 생성
-choropleth_map_sido = make_choropleth(df_grouped_sido, geojson, '위치코드_시군구', '사고건수', 'Reds')  # Use the "Reds" color scale
+@memoize('figures', maxsize=64, key=lambda path, geojson_path, sido_geojson_path, sido: ('sido_choropleth', file_key(path, geojson_path, sido_geojson_path), sido))
+@prebuilt_figure
+def sido_choropleth(path, geojson_path, sido_geojson_path, sido):
+    df_sorted_sido, df_grouped_sido = summarize_sido_hotspots(path, geojson_path, sido_geojson_path, sido)
+    choropleth = make_choropleth(df_grouped_sido, load_geo_tiles(geojson_path), '시군구코드', '사고건수', 'Reds')  # Use the "Reds" color scale
+
+    # 시군구 위에 사고 다발 지역 폴리곤 레이어 추가 (좌표는 소수점 5자리 = 약 1m 단위로 반올림)
+    hotspot_polygons = load_hotspot_polygons(path)
+    df_hotspots = df_sorted_sido[hotspot_polygons.is_valid[df_sorted_sido.index]]
+    choropleth.add_trace(go.Choropleth(
+        geojson=to_feature_collection(hotspot_polygons, df_hotspots[[]], decimals=5),
+        featureidkey='properties.id',
+        locations=df_hotspots.index,
+        z=df_hotspots['사고건수'],
+        text=df_hotspots['사고지역위치명'],
+        hovertemplate='%{text}<br>사고건수: %{z}<extra></extra>',
+        colorscale='Greys',
+        showscale=False,
+        marker_line_width=0,
+    ))
+    return choropleth
+
+choropleth_map_sido = sido_choropleth(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH, selected_sido)
 
 # 선택된 시도에 대한 지도 표시
 st.markdown(f'#### 2. {selected_sido}의 교통사고 다발 지역 시각화 (2012-2021)')
-st.plotly_chart(choropleth_map_sido)
+render('시도 Choropleth 지도', st.plotly_chart, choropleth_map_sido)
 
 
 # 선택된 시도의 사고건수 기준 내림차순으로 정렬된 사고지역위치명 상위 10개 표시
 st.markdown(f"##### ⦁ {selected_sido} 내 사고 다발 지역 (Top10)")
 
 # 가운데 정렬을 위한 스타일 지정
-styled_table_sido = df_sorted_sido[['사고지역위치명', '사고건수']].head(10).style.set_table_styles(
-    [{'selector': 'th', 
-      'props': [('background-color', '#D3D3D3'), ('font-weight', 'bold'), ('text-align', 'center')]}]
-).apply(center_align, axis=0)
+styled_table_sido = style_table(hotspot_ranking.group_top(selected_sido, 10)[['사고지역위치명', '사고건수']])
 
 # 스타일이 적용된 테이블 표시
-st.table(styled_table_sido)
+render('시도 사고 다발 지역 Top10', st.table, styled_table_sido)
+
+# 선택된 시도의 히트맵
+st.markdown(f"##### ⦁ {selected_sido} 교통사고 다발 지역 히트맵")
+render('시도 히트맵', st.iframe, heatmap_html(HOTSPOT_PATH, GEOJSON_PATH, SIDO_GEOJSON_PATH, selected_sido, zoom_start=9), height=500)
+
+# ----------------------------
+# 대상사고 구분별 시도 교통사고 (10_22_stt.csv)
+# ----------------------------
+
+# 연도 x 대상사고 구분 x 지역 x 항목 배열과 연도 누적합을 한 번만 만들어 두고(accident_stats.py),
+# 연도 범위, 구분, 항목을 바꿀 때는 groupby 없이 배열 조회로 지도와 그래프의 데이터를 만듭니다.
+STATS_PATH = '교통사고 데이터/10_22_stt.csv'
+
+@memoize('accident_stats', maxsize=FILE_CACHE_SIZE, key=file_key)
+def load_stats_cube(path):
+    return AccidentStatsCube(read_accident_stats(path))
+
+@memoize('figures', maxsize=64, key=lambda path, sido_geojson_path, years, category, measure: ('stats_choropleth', file_key(path, sido_geojson_path), years, category, measure))
+@prebuilt_figure
+def stats_choropleth(path, sido_geojson_path, years, category, measure):
+    # 통계의 시도 코드는 CTPRVN_CD로 변환해 시도 경계 타일에서 지역을 찾음
+    df_stats_sido = load_stats_cube(path).totals('sido', years, category, [measure])
+    if measure not in RATE_MEASURES:
+        df_stats_sido[measure] = df_stats_sido[measure].astype('int64')  # 값이 없는 시도는 totals에서 제외됨
+    colorbar_title = measure if measure == '치사율' else f'누적 {measure}'
+    return make_choropleth(df_stats_sido, load_geo_tiles(sido_geojson_path, 'CTPRVN_CD'), '시도코드', measure, 'Purples',
+                           featureidkey='properties.CTPRVN_CD', label=measure, colorbar_title=colorbar_title)
+
+# 선택한 구분들의 연도별 전국 추이
+@memoize('figures', maxsize=64, key=lambda path, years, categories, measure: ('stats_trend', file_key(path), years, categories, measure))
+@prebuilt_figure
+def stats_trend_figure(path, years, categories, measure):
+    df_stats_trend = load_stats_cube(path).trend('national', years, list(categories), [measure])
+    fig = px.line(df_stats_trend, x='연도', y=measure, color='대상사고 구분명', markers=True,
+                  title=f'대상사고 구분별 {measure} 추이 ({years[0]}-{years[1]})')
+    fig.update_xaxes(tickmode='linear', dtick=1)
+    return fig
+
+stats_job = start_warmup('대상사고 구분별 통계', load_stats_cube, STATS_PATH)
+
+def draw_stats_section():
+    stats_cube = load_stats_cube(STATS_PATH)
+    st.markdown(f'#### 3. 대상사고 구분별 시도 교통사고 ({stats_cube.years[0]}-{stats_cube.years[-1]})')
+    stats_years = st.slider('연도 범위', min_value=stats_cube.years[0], max_value=stats_cube.years[-1],
+                            value=(stats_cube.years[0], stats_cube.years[-1]))
+    stats_category = st.selectbox('대상사고 구분', options=stats_cube.categories)
+    stats_measure = st.selectbox('항목', options=stats_cube.measure_options)
+
+    render('대상사고 구분별 시도 지도', st.plotly_chart, stats_choropleth(STATS_PATH, SIDO_GEOJSON_PATH, stats_years, stats_category, stats_measure))
+
+    stats_trend_categories = st.multiselect('추이를 비교할 대상사고 구분', options=stats_cube.categories, default=[stats_category])
+    if stats_trend_categories:
+        render('대상사고 구분별 추이', st.plotly_chart, stats_trend_figure(STATS_PATH, stats_years, tuple(stats_trend_categories), stats_measure))
+
+lazy_section(stats_job, draw_stats_section)
 
 # ----------------------------
 # 요일, 시간대별 교통사고 추이 분석
 # ----------------------------
 
+section('Q2. 요일, 시간대별 교통사고')
 st.markdown('### <span style="color:#4169e1">Q2. 운전하기에 적절한 요일, 시간대는 언제일까?</span>', unsafe_allow_html=True)
 
-# # 두 개의 엑셀 파일을 읽어옵니다
-# df1 = pd.read_excel('교통사고 데이터/요일별시간대별_사고건수(2014-2018).xls', header=2, index_col=0)
-# df2 = pd.read_excel('교통사고 데이터/요일별시간대별_사고건수(2019-2023).xls', header=2, index_col=0)
-
-# # 두 데이터프레임을 병합합니다
-# df_combined = pd.concat([df1, df2], axis=1)
+# 요일별 시간대별 사고 통계 엑셀 파일 (두 파일을 프로세스 풀로 동시에 읽어 파일 순서대로 이어 붙임)
+weekday_hour_paths = (
+    '교통사고 데이터/요일별시간대별_사고건수(2014-2018).xls',
+    '교통사고 데이터/요일별시간대별_사고건수(2019-2023).xls',
+)
 
-# # '합계' 열을 기준으로 데이터를 전처리합니다
-# df_accidents = df_combined.loc['합계', :].T.reset_index()
-# df_accidents.columns = ['시간대', '사고건수']
+@memoize('weekday_hour', maxsize=FILE_CACHE_SIZE, key=lambda paths: file_key(*paths))
+def load_weekday_hour(paths):
+    return pd.concat(load_in_parallel(read_weekday_hour_xls, paths), ignore_index=True)
 
-# # 다중 인덱스 문제 해결
-# df_accidents = df_accidents.drop(columns='index', errors='ignore')
+@memoize('figures', maxsize=64, key=lambda paths: ('weekday_hour', file_key(*paths)))
+@prebuilt_figure
+def weekday_hour_figures(paths):
+    df_weekday_hour = load_weekday_hour(paths)
+    df_days = weekday_hour_table(df_weekday_hour, '사고[건]')
 
-# # 시간대를 순서대로 정렬
-# df_accidents['시간대'] = pd.Categorical(df_accidents['시간대'], categories=[
-#     '00시-02시', '02시-04시', '04시-06시', '06시-08시', '08시-10시', '10시-12시', 
-#     '12시-14시', '14시-16시', '16시-18시', '18시-20시', '20시-22시', '22시-24시'], ordered=True)
-# df_accidents = df_accidents.sort_values('시간대')
+    # 요일별 시간대별 사고건수 히트맵
+    fig_heatmap = px.imshow(df_days.values,
+                            labels=dict(x="시간대", y="요일", color="사고건수"),
+                            x=df_days.columns.astype(str), y=df_days.index.astype(str),
+                            color_continuous_scale='Reds')
 
-# # 요일별 사고건수 합계
-# df_days = df_combined.loc[df_combined.index.get_level_values(1) == '사고[건]'].reset_index(level=1, drop=True)
+    # 시간대별 사고건수
+    df_accidents = df_days.sum(axis=0).rename('사고건수').rename_axis('시간대').reset_index()
+    fig_bar = px.bar(df_accidents, x='시간대', y='사고건수', title='시간대별 교통사고 건수',
+                     labels={'사고건수': '사고 건수', '시간대': '시간대'})
 
-# # 요일별 시간대별 사고건수 히트맵
-# fig_heatmap = px.imshow(df_days.values,
-#                         labels=dict(x="시간대", y="요일", color="사고건수"),
-#                         x=df_days.columns, y=df_days.index,
-#                         color_continuous_scale='Reds')
+    # 요일별 사고건수
+    df_day_totals = df_days.sum(axis=1).rename('사고건수').rename_axis('요일').reset_index()
+    fig_day_bar = px.bar(df_day_totals, x='요일', y='사고건수', title='요일별 교통사고 건수',
+                         labels={'사고건수': '사고 건수', '요일': '요일'})
+    return fig_heatmap, fig_bar, fig_day_bar
 
-# st.markdown('### <span style="color:#4169e1">Q2. 요일 및 시간대별 교통사고 현황</span>', unsafe_allow_html=True)
+weekday_hour_job = start_warmup('요일별 시간대별 사고 통계', weekday_hour_figures, weekday_hour_paths)
 
-# # Plotly 그래프 생성 - 시간대별 사고건수
-# fig_bar = px.bar(df_accidents, x='시간대', y='사고건수', title='시간대별 교통사고 건수',
-#                  labels={'사고건수': '사고 건수', '시간대': '시간대'})
+def draw_weekday_hour_section():
+    fig_heatmap, fig_bar, fig_day_bar = weekday_hour_figures(weekday_hour_paths)
 
-# # Plotly 그래프 생성 - 요일별 사고건수
-# fig_day_bar = px.bar(df_days.sum(axis=1).reset_index(), x='사고요일', y=0, title='요일별 교통사고 건수',
-#                      labels={0: '사고 건수', '사고요일': '요일'})
+    # Streamlit에서 Plotly 그래프 표시
+    render('요일 x 시간대 히트맵', st.plotly_chart, fig_heatmap)
+    render('시간대별 사고건수', st.plotly_chart, fig_bar)
+    render('요일별 사고건수', st.plotly_chart, fig_day_bar)
 
-# # Streamlit에서 Plotly 그래프 표시
-# st.plotly_chart(fig_heatmap)
-# st.plotly_chart(fig_bar)
-# st.plotly_chart(fig_day_bar)
+lazy_section(weekday_hour_job, draw_weekday_hour_section)
 
 
 # ----------------------------
 # 여러 연도의 데이터를 결합하여 특정 기간의 교통사고 추이 분석
 # ----------------------------
 
-# 여러 연도의 데이터를 결합하기 위해 파일 경로 목록을 만듭니다.
-file_paths = [
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2016).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2017).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2018).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2019).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2020).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2021).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2022).csv',
-    '교통사고 데이터/도로교통공단_일자별 시군구별 교통사고 건수(2023).csv'
-]
-
-# 데이터를 저장할 빈 리스트를 만듭니다.
-df3_list = []
-
-# 각 파일을 불러와서 리스트에 추가합니다.
-for file_path in file_paths:
-    year = int(file_path[-9:-5])  # 파일명에서 연도 추출
-    df3 = pd.read_csv(file_path, encoding='euc-kr')
-    df3['발생년도'] = year  # 발생년도 열 추가
-    df3_list.append(df3)
-
-# 모든 데이터를 하나의 데이터프레임으로 결합합니다.
-df3_combined = pd.concat(df3_list, ignore_index=True)
-
-# ----------------------------
-# 어린이날 교통사고 추이 분석
-# ----------------------------
-
-# 어린이날 (5월 5일) 데이터 필터링
-df_children_day = df3_combined[(df3_combined['발생월'] == 5) & (df3_combined['발생일'] == 5)]
-
-# 연도별 사고 건수 및 사망자수, 중상자수, 경상자수 집계
-children_day_stats = df_children_day.groupby('발생년도').sum()[['사고건수', '사망자수', '중상자수', '경상자수']].reset_index()
-
-# 사고 추이 분석 - 어린이날
+section('Q3. 특정 기간의 교통사고 추이')
 st.markdown('### <span style="color:#4169e1">Q3. 특정 기간의 교통사고 추이는 어떻게 변화했을까?</span>', unsafe_allow_html=True)
 
-# 가설1 텍스트에 빨간색 밑줄 추가
-st.markdown('##### [가설1] 고령화와 저출산의 영향으로 어린이 인구가 감소하면서, <span style="text-decoration: underline; text-decoration-color: red; text-underline-offset: 0.2em; text-decoration-thickness: 2px;">어린이날의 교통사고 발생 건수도 감소할 것이다.</span>', 
-            unsafe_allow_html=True)
-
-# Plotly 그래프 생성
-fig = px.line(children_day_stats, x='발생년도', y=['사고건수', '사망자수', '중상자수', '경상자수'],
-              labels={'value': '수치', 'variable': '항목', '발생년도': '연도'},
-              markers=True,
-              title='어린이날 교통사고 추이 (2016-2023)')
-
-# x축 모든 연도 표시
-fig.update_xaxes(tickmode='linear', dtick=1)
-
-# Streamlit에서 Plotly 그래프 표시
-st.plotly_chart(fig)
+# 일자별 데이터를 읽을 때 한 번에 메모리에 올리는 데이터의 상한 (바이트)
+DAILY_MEMORY_BUDGET = 64 * 2 ** 20
 
 # ----------------------------
-# 명절 기간 교통사고 추이 분석
+# 분석 대상 기간 설정
 # ----------------------------
 
-# 가설2 텍스트에 빨간색 밑줄 추가
-st.markdown('##### [가설2] 비대면 명절 문화의 확산 등 사회적 변화로 인해 <span style="text-decoration: underline; text-decoration-color: red; text-underline-offset: 0.2em; text-decoration-thickness: 2px;">명절 기간 동안의 유동인구가 감소하면서 교통사고 발생 건수도 줄어들 것이다.</span>', 
-            unsafe_allow_html=True)
-
 # 연도별 설날 연휴 날짜 딕셔너리
 lunar_new_year_dates = {
     2016: [('02-07'), ('02-08'), ('02-09'), ('02-10')],
@@ -278,79 +468,6 @@ chuseok_dates = {
     2023: [('09-28'), ('09-29'), ('09-30')]
 }
 
-def filter_holiday_data(df, holiday_dates):
-    holiday_data_list = []
-    for year, dates in holiday_dates.items():
-        for date_str in dates:
-            month, day = map(int, date_str.split('-'))
-            filtered_data = df[
-                (df['발생년도'] == year) &
-                (df['발생월'] == month) &
-                (df['발생일'] == day)
-            ]
-            holiday_data_list.append(filtered_data)
-    return pd.concat(holiday_data_list, ignore_index=True)
-
-# 설날 교통사고 데이터 필터링 및 집계
-df_lunar_new_year = filter_holiday_data(df3_combined, lunar_new_year_dates)
-lunar_new_year_stats = df_lunar_new_year.groupby('발생년도').sum()[['사고건수', '사망자수', '중상자수', '경상자수']].reset_index()
-years_with_dates_lunar = [f"{year}\n({lunar_new_year_dates[year][0][0]}~{lunar_new_year_dates[year][-1][-1]})" for year in lunar_new_year_stats['발생년도']]
-
-# 추석 교통사고 데이터 필터링 및 집계
-df_chuseok = filter_holiday_data(df3_combined, chuseok_dates)
-chuseok_stats = df_chuseok.groupby('발생년도').sum()[['사고건수', '사망자수', '중상자수', '경상자수']].reset_index()
-years_with_dates_chuseok = [f"{year}\n({chuseok_dates[year][0][0]}~{chuseok_dates[year][-1][-1]})" for year in chuseok_stats['발생년도']]
-
-# 설날 교통사고 추이 그래프 생성
-fig_lunar = go.Figure()
-
-for column in ['사고건수', '사망자수', '중상자수', '경상자수']:
-    fig_lunar.add_trace(go.Scatter(x=lunar_new_year_stats['발생년도'], y=lunar_new_year_stats[column], mode='lines+markers', name=column))
-
-fig_lunar.update_layout(
-    title='설날 교통사고 추이 (2016-2023)',
-    xaxis_title='연도 및 설날 기간',
-    yaxis_title='수치',
-    xaxis=dict(
-        tickmode='linear',
-        dtick=1,  # 모든 연도 표시
-        tickangle=0,  # x축 레이블 수평으로 표시
-        tickvals=lunar_new_year_stats['발생년도'],
-        ticktext=years_with_dates_lunar
-    )
-)
-
-# 추석 교통사고 추이 그래프 생성
-fig_chuseok = go.Figure()
-
-for column in ['사고건수', '사망자수', '중상자수', '경상자수']:
-    fig_chuseok.add_trace(go.Scatter(x=chuseok_stats['발생년도'], y=chuseok_stats[column], mode='lines+markers', name=column))
-
-fig_chuseok.update_layout(
-    title='추석 교통사고 추이 (2016-2023)',
-    xaxis_title='연도 및 추석 기간',
-    yaxis_title='수치',
-    xaxis=dict(
-        tickmode='linear',
-        dtick=1,  # 모든 연도 표시
-        tickangle=0,  # x축 레이블 수평으로 표시
-        tickvals=chuseok_stats['발생년도'],
-        ticktext=years_with_dates_chuseok
-    )
-)
-
-# Streamlit에서 Plotly 그래프 표시
-st.plotly_chart(fig_lunar)
-st.plotly_chart(fig_chuseok)
-
-# ----------------------------
-# 월드컵 기간 교통사고 추이 분석
-# ----------------------------
-
-# 가설3 텍스트에 빨간색 밑줄 추가
-st.markdown('##### [가설3] 월드컵 기간에는 유동인구가 증가하여 <span style="text-decoration: underline; text-decoration-color: red; text-underline-offset: 0.2em; text-decoration-thickness: 2px;">교통사고 발생 건수도 증가할 것이다.</span>', 
-            unsafe_allow_html=True)
-
 # 월드컵 기간 설정 (예시로 대한민국 경기 날짜 포함)
 world_cup_dates_2018 = [
     ('06-14', '07-15')  # 2018 러시아 월드컵 전체 기간
@@ -360,76 +477,263 @@ world_cup_dates_2022 = [
     ('11-20', '12-18')  # 2022 카타르 월드컵 전체 기간
 ]
 
-def filter_world_cup_data(df, world_cup_dates, year):
-    world_cup_data_list = []
-    for start_date, end_date in world_cup_dates:
-        start_month, start_day = map(int, start_date.split('-'))
-        end_month, end_day = map(int, end_date.split('-'))
-        
-        filtered_data = df[
-            (df['발생년도'] == year) &
-            ((df['발생월'] == start_month) & (df['발생일'] >= start_day) | (df['발생월'] == end_month) & (df['발생일'] <= end_day))
-        ]
-        world_cup_data_list.append(filtered_data)
-    
-    return pd.concat(world_cup_data_list, ignore_index=True)
-
-# 2018년 데이터 필터링
-df_wc_2018 = filter_world_cup_data(df3_combined, world_cup_dates_2018, 2018)
-
-# 2022년 데이터 필터링
-df_wc_2022 = filter_world_cup_data(df3_combined, world_cup_dates_2022, 2022)
-
-# 연도별 사고 건수 집계
-wc_2018_stats = df_wc_2018.groupby('발생년도').sum()[['사고건수']].reset_index()
-wc_2022_stats = df_wc_2022.groupby('발생년도').sum()[['사고건수']].reset_index()
-
-# 월드컵 기간 동안의 사고 건수를 추가
-wc_2018_stats['기간'] = '2018 월드컵 기간'
-wc_2022_stats['기간'] = '2022 월드컵 기간'
-
-# 두 기간의 데이터 병합
-wc_stats_combined = pd.concat([wc_2018_stats, wc_2022_stats], ignore_index=True)
-
-# 월드컵 기간 동안의 사고 건수 시각화
-fig_wc = px.bar(wc_stats_combined, x='기간', y='사고건수', title='월드컵 기간 동안의 교통사고 건수 비교',
-                labels={'사고건수': '사고 건수', '기간': '기간'})
+# 명절 이름별 날짜 딕셔너리 (그래프 캐시 키로 명절 이름을 사용)
+holiday_dates_by_name = {
+    '설날': lunar_new_year_dates,
+    '추석': chuseok_dates,
+}
 
-# Streamlit에서 그래프 표시
-st.plotly_chart(fig_wc)
+# Q3의 모든 이벤트 기간(어린이날, 설날, 추석, 월드컵)
+# 새로운 가설의 기간은 event_windows 함수로 기간을 만들어 아래 목록에 추가하면 됩니다.
+def make_event_windows(cube):
+    return pd.concat([
+        windows_from_dates('어린이날', {year: ['05-05'] for year in cube.years}),
+        windows_from_dates('설날', lunar_new_year_dates),
+        windows_from_dates('추석', chuseok_dates),
+        windows_from_ranges('2018 월드컵 기간', world_cup_dates_2018, 2018),
+        windows_from_ranges('2022 월드컵 기간', world_cup_dates_2022, 2022),
+    ], ignore_index=True)
+
+EVENT_MEASURES = ['사고건수', '사망자수', '중상자수', '경상자수']
+
+# 일자별 데이터 저장소 (accident_snapshots.py)
+# 날짜 x 시군구 x 항목 큐브와 이벤트 기간별 통계를 스냅샷으로 가지고 있다가, 연도별 파일이 새로 생기거나 바뀌면
+# 그 연도만 다시 읽은 새 스냅샷을 만듭니다. (파일 이름 패턴으로 찾으므로 새 연도 파일은 넣기만 하면 자동으로 포함)
+# 서버에서는 감시 스레드가 주기적으로 파일을 확인하고, rerun은 시작할 때의 스냅샷 하나로 Q3 전체를 그립니다.
+@memoize('daily_store')
+def open_daily_store():
+    store = DailyAccidentStore(make_event_windows, EVENT_MEASURES, DAILY_FILE_PATTERN, DAILY_MEMORY_BUDGET)
+    if st.runtime.exists():
+        store.watch()
+    return store
+
+# 스냅샷의 날짜 x 시군구 x 항목 큐브 (어린이날, 명절, 월드컵 분석은 모두 이 큐브에서 날짜 조회로 집계)
+# 아래 함수들의 files 인자는 스냅샷의 키((경로, 수정 시각, 크기) 목록)입니다.
+def load_cube(files):
+    return open_daily_store().snapshot(files).cube
+
+# 이벤트별, 연도별 통계 (기간별 통계는 스냅샷을 만들 때 바뀐 연도만 다시 계산해 둠)
+# 연도 중간까지만 있는 파일이 들어오면 데이터가 없는 기간이 0건으로 그려지지 않도록 기간 전체에 데이터가 있는 기간만 사용
+@memoize('event_stats', maxsize=SNAPSHOT_HISTORY, key=lambda files: files)
+def load_event_stats(files):
+    stats = complete_windows(open_daily_store().snapshot(files).window_stats)
+    return stats.groupby(['이벤트', '발생년도'], as_index=False)[EVENT_MEASURES].sum()
+
+# 스냅샷에 들어 있는 연도 범위 (그래프 제목용, 예: '2016-2023')
+def year_range(files):
+    years = load_cube(files).years
+    return f'{years[0]}-{years[-1]}'
+
+# 이벤트 기간과 앞뒤 1~2주의 같은 요일 기간(평소)의 일평균 사고건수 비교
+@memoize('event_baseline', maxsize=SNAPSHOT_HISTORY, key=lambda files: files)
+def event_baseline_table(files):
+    cube = load_cube(files)
+    comparison = compare_with_baseline(cube, make_event_windows(cube))
+    comparison['기준 대비 비율'] = comparison['기준 대비 비율'].round(2)
+    comparison['일평균 사고건수'] = comparison['일평균 사고건수'].round(1)
+    comparison['기준 일평균 사고건수'] = comparison['기준 일평균 사고건수'].round(1)
+    return comparison[['이벤트', '발생년도', '일평균 사고건수', '기준 일평균 사고건수', '기준 대비 비율']]
 
+# ----------------------------
+# 어린이날 교통사고 추이 분석
+# ----------------------------
 
-# 2018년과 2022년 데이터를 그룹화하여 월별 사고 건수를 계산
-df_2018 = df3_combined[df3_combined['발생년도'] == 2018].groupby('발생월').sum()[['사고건수']].reset_index()
-df_2022 = df3_combined[df3_combined['발생년도'] == 2022].groupby('발생월').sum()[['사고건수']].reset_index()
+@memoize('figures', maxsize=64, key=lambda files: ('children_day', files))
+@prebuilt_figure
+def children_day_figure(files):
+    # 어린이날 (5월 5일)의 연도별 사고 건수 및 사망자수, 중상자수, 경상자수 집계
+    event_stats = load_event_stats(files)
+    children_day_stats = event_stats[event_stats['이벤트'] == '어린이날']
 
-# 연도 정보 추가
-df_2018['연도'] = '2018'
-df_2022['연도'] = '2022'
+    # Plotly 그래프 생성
+    fig = px.line(children_day_stats, x='발생년도', y=['사고건수', '사망자수', '중상자수', '경상자수'],
+                  labels={'value': '수치', 'variable': '항목', '발생년도': '연도'},
+                  markers=True,
+                  title=f'어린이날 교통사고 추이 ({year_range(files)})')
 
-# 2018년과 2022년 데이터를 결합
-df_combined = pd.concat([df_2018, df_2022])
+    # x축 모든 연도 표시
+    fig.update_xaxes(tickmode='linear', dtick=1)
+    return fig
 
-# 하나의 그래프에 2018년과 2022년 데이터를 표시
-fig_combined = px.line(df_combined, x='발생월', y='사고건수', color='연도', 
-                       title='2018년과 2022년 월드컵 기간 동안의 교통사고 건수 변화',
-                       labels={'발생월': '월', '사고건수': '사고 건수', '연도': '연도'})
+# ----------------------------
+# 명절 기간 교통사고 추이 분석
+# ----------------------------
 
-# 2018년 월드컵 기간 표시
-fig_combined.add_scatter(x=[6, 7], y=df_2018[df_2018['발생월'].isin([6, 7])]['사고건수'], 
-                         mode='lines+markers', name='2018 월드컵 기간', line=dict(dash='dot'))
+# 명절 교통사고 추이 그래프 생성
+@memoize('figures', maxsize=64, key=lambda files, holiday_name: ('holiday', files, holiday_name))
+@prebuilt_figure
+def holiday_figure(files, holiday_name):
+    holiday_dates = holiday_dates_by_name[holiday_name]
+
+    # 명절 교통사고 데이터 집계
+    event_stats = load_event_stats(files)
+    holiday_stats = event_stats[event_stats['이벤트'] == holiday_name]
+    years_with_dates = [f"{year}\n({holiday_dates[year][0][0]}~{holiday_dates[year][-1][-1]})" for year in holiday_stats['발생년도']]
+
+    fig_holiday = go.Figure()
+
+    for column in ['사고건수', '사망자수', '중상자수', '경상자수']:
+        fig_holiday.add_trace(go.Scatter(x=holiday_stats['발생년도'], y=holiday_stats[column], mode='lines+markers', name=column))
+
+    fig_holiday.update_layout(
+        title=f'{holiday_name} 교통사고 추이 ({year_range(files)})',
+        xaxis_title=f'연도 및 {holiday_name} 기간',
+        yaxis_title='수치',
+        xaxis=dict(
+            tickmode='linear',
+            dtick=1,  # 모든 연도 표시
+            tickangle=0,  # x축 레이블 수평으로 표시
+            tickvals=holiday_stats['발생년도'],
+            ticktext=years_with_dates
+        )
+    )
+    return fig_holiday
 
-# 2022년 월드컵 기간 표시
-fig_combined.add_scatter(x=[11, 12], y=df_2022[df_2022['발생월'].isin([11, 12])]['사고건수'], 
-                         mode='lines+markers', name='2022 월드컵 기간', line=dict(dash='dot'))
+# ----------------------------
+# 월드컵 기간 교통사고 추이 분석
+# ----------------------------
 
-# Streamlit에서 그래프 표시
-st.plotly_chart(fig_combined)
+@memoize('figures', maxsize=64, key=lambda files: ('world_cup', files))
+@prebuilt_figure
+def world_cup_figure(files):
+    # 2018년, 2022년 월드컵 기간의 사고 건수
+    event_stats = load_event_stats(files)
+    wc_stats_combined = event_stats[event_stats['이벤트'].isin(['2018 월드컵 기간', '2022 월드컵 기간'])]
+    wc_stats_combined = wc_stats_combined[['발생년도', '사고건수', '이벤트']].rename(columns={'이벤트': '기간'})
+
+    # 월드컵 기간 동안의 사고 건수 시각화
+    return px.bar(wc_stats_combined, x='기간', y='사고건수', title='월드컵 기간 동안의 교통사고 건수 비교',
+                  labels={'사고건수': '사고 건수', '기간': '기간'})
+
+
+@memoize('figures', maxsize=64, key=lambda files: ('world_cup_monthly', files))
+@prebuilt_figure
+def world_cup_monthly_figure(files):
+    cube = load_cube(files)
+
+    # 2018년과 2022년의 월별 사고 건수를 계산
+    df_2018 = cube.monthly_totals(2018, ['사고건수'])
+    df_2022 = cube.monthly_totals(2022, ['사고건수'])
+
+    # 연도 정보 추가
+    df_2018['연도'] = '2018'
+    df_2022['연도'] = '2022'
+
+    # 2018년과 2022년 데이터를 결합
+    df_combined = pd.concat([df_2018, df_2022])
+
+    # 하나의 그래프에 2018년과 2022년 데이터를 표시
+    fig_combined = px.line(df_combined, x='발생월', y='사고건수', color='연도', 
+                           title='2018년과 2022년 월드컵 기간 동안의 교통사고 건수 변화',
+                           labels={'발생월': '월', '사고건수': '사고 건수', '연도': '연도'})
+
+    # 2018년 월드컵 기간 표시
+    fig_combined.add_scatter(x=[6, 7], y=df_2018[df_2018['발생월'].isin([6, 7])]['사고건수'], 
+                             mode='lines+markers', name='2018 월드컵 기간', line=dict(dash='dot'))
+
+    # 2022년 월드컵 기간 표시
+    fig_combined.add_scatter(x=[11, 12], y=df_2022[df_2022['발생월'].isin([11, 12])]['사고건수'], 
+                             mode='lines+markers', name='2022 월드컵 기간', line=dict(dash='dot'))
+    return fig_combined
+
+# 첫 스냅샷과 Q3 그래프는 백그라운드에서 만들어 두고, 준비되면 그래프들을 그림
+def build_event_figures(store):
+    files = store.current().files
+    return (children_day_figure(files), holiday_figure(files, '설날'), holiday_figure(files, '추석'),
+            world_cup_figure(files), world_cup_monthly_figure(files))
+
+daily_store = open_daily_store()
+event_job = start_warmup('일자별 교통사고 데이터', build_event_figures, daily_store)
+
+# 사고 추이 분석 (어린이날, 명절, 월드컵)
+def draw_event_section():
+    # 이번 rerun에서 사용할 스냅샷 (그리는 도중에 새 스냅샷이 생겨도 아래 그래프는 모두 같은 데이터로 그림)
+    daily_files = daily_store.current().files
+    try:
+        draw_event_figures(daily_files)
+    except KeyError:
+        # 그리는 도중에 고정한 스냅샷이 기록에서 지워졌으면 최신 스냅샷으로 다시 고정해 처음부터 다시 그림
+        if daily_store.has_snapshot(daily_files):
+            raise
+        st.rerun()
+
+def draw_event_figures(daily_files):
+    # 사고 추이 분석 - 어린이날
+    # 가설1 텍스트에 빨간색 밑줄 추가
+    st.markdown('##### [가설1] 고령화와 저출산의 영향으로 어린이 인구가 감소하면서, <span style="text-decoration: underline; text-decoration-color: red; text-underline-offset: 0.2em; text-decoration-thickness: 2px;">어린이날의 교통사고 발생 건수도 감소할 것이다.</span>', 
+                unsafe_allow_html=True)
+
+    # Streamlit에서 Plotly 그래프 표시
+    fig = children_day_figure(daily_files)
+    render('어린이날 추이', st.plotly_chart, fig)
+
+    # 사고 추이 분석 - 명절
+    # 가설2 텍스트에 빨간색 밑줄 추가
+    st.markdown('##### [가설2] 비대면 명절 문화의 확산 등 사회적 변화로 인해 <span style="text-decoration: underline; text-decoration-color: red; text-underline-offset: 0.2em; text-decoration-thickness: 2px;">명절 기간 동안의 유동인구가 감소하면서 교통사고 발생 건수도 줄어들 것이다.</span>', 
+                unsafe_allow_html=True)
+
+    # 설날, 추석 교통사고 추이 그래프 생성
+    fig_lunar = holiday_figure(daily_files, '설날')
+    fig_chuseok = holiday_figure(daily_files, '추석')
+
+    # Streamlit에서 Plotly 그래프 표시
+    render('설날 추이', st.plotly_chart, fig_lunar)
+    render('추석 추이', st.plotly_chart, fig_chuseok)
+
+    # 사고 추이 분석 - 월드컵
+    # 가설3 텍스트에 빨간색 밑줄 추가
+    st.markdown('##### [가설3] 월드컵 기간에는 유동인구가 증가하여 <span style="text-decoration: underline; text-decoration-color: red; text-underline-offset: 0.2em; text-decoration-thickness: 2px;">교통사고 발생 건수도 증가할 것이다.</span>', 
+                unsafe_allow_html=True)
+
+    # Streamlit에서 그래프 표시
+    fig_wc = world_cup_figure(daily_files)
+    render('월드컵 기간 사고건수', st.plotly_chart, fig_wc)
+
+    fig_combined = world_cup_monthly_figure(daily_files)
+    render('월드컵 연도 월별 사고건수', st.plotly_chart, fig_combined)
+
+    # 이벤트 기간과 평소(앞뒤 1~2주의 같은 요일)의 일평균 사고건수 비교
+    st.markdown("##### ⦁ 평소 대비 이벤트 기간의 일평균 사고건수 (앞뒤 1~2주의 같은 요일 기준)")
+    render('평소 대비 이벤트 기간', st.table, style_table(event_baseline_table(daily_files)))
+
+lazy_section(event_job, draw_event_section)
 
 # 사고 추이 분석 - 미세먼지
+section('Q4. 미세먼지')
 st.markdown('### <span style="color:#4169e1">Q4. 미세먼지에 따른 교통사고건수 변화는?</span>', unsafe_allow_html=True)
 
 # 사고 추이 분석 - 주가등락률
+section('Q5. 주가 등락률')
 st.markdown('### <span style="color:#4169e1">Q5. 주가 등락률에 따른 교통사고건수 변화는?</span>', unsafe_allow_html=True)
 
-
+# 관리자용 사이드바 패널 (성능 측정과 같이 ?profile=1 로 접속했을 때만 표시)
+if profiling_enabled:
+    # 원본 파일별 불러오기 소요 시간 (캐시가 없어 실제로 파일을 읽었을 때의 기록)
+    with st.sidebar.expander('파일별 불러오기 소요 시간'):
+        st.dataframe(load_timings(), hide_index=True)
+
+    # 백그라운드 불러오기 작업 상태
+    with st.sidebar.expander('백그라운드 불러오기'):
+        st.dataframe(warmup_status(), hide_index=True)
+
+    # 일자별 데이터 스냅샷 (새 연도 파일을 반영할 때마다 버전이 올라감)
+    with st.sidebar.expander('일자별 데이터 스냅샷'):
+        st.dataframe(daily_store.history(), hide_index=True)
+
+# 성능 측정 결과 (?profile=1 로 접속했을 때만 표시, 패널 자체를 그리는 시간은 포함하지 않음)
+profile = finish_run()
+if profile is not None:
+    hits, misses = profile.cache_counts()
+    with st.sidebar.expander('성능 측정 (관리자)', expanded=True):
+        st.markdown(f'이번 rerun: {profile.seconds * 1000:.0f} ms, 캐시 적중 {hits}회, 다시 계산 {misses}회')
+        first_render = profile.first_render_seconds()
+        if first_render is not None:
+            st.markdown(f'첫 차트까지: {first_render * 1000:.0f} ms')
+        st.dataframe(profile.to_frame(), hide_index=True)
+        st.dataframe(profile.cache_frame(), hide_index=True)
+
+        # 최근 rerun 목록과 내보내기
+        runs = recent_runs()
+        st.dataframe(runs_frame(runs), hide_index=True)
+        st.download_button('Chrome trace 내려받기', chrome_trace(runs), file_name='app_trace.json', mime='application/json')
+        st.download_button('JSON 로그 내려받기', log_lines(runs), file_name='app_spans.jsonl', mime='application/x-ndjson')
@@ -0,0 +1,471 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import pickle
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# app.py 단계별 성능 측정
+# ----------------------------
+
+# Streamlit 서버 없이 app.py를 그대로 실행해(bare mode) 앱이 정의한 함수들을 얻은 다음,
+# 메모리 캐시와 디스크 캐시(.cache, static/heat)를 비운 상태에서 단계별로 다시 호출하며
+# 소요 시간, 최대 RSS, 결과 크기(바이트)를 기록한다.
+# 원본 데이터를 행 수와 연도 수 기준으로 늘린 합성 데이터셋을 만들어 규모에 따른 변화도 볼 수 있고,
+# 결과는 JSON으로 저장해 이전 결과와 비교(회귀 검사)할 수 있다.
+#
+#   python benchmark.py --scales 1 10 --output bench.json
+#   python benchmark.py --scales 1 10 --compare bench.json --threshold 0.2
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(REPO_DIR, 'app.py')
+BENCH_DIR = os.path.join(REPO_DIR, '.cache', 'bench')
+
+DATA_DIR = '교통사고 데이터'
+GEO_DIR = '법정구역 GeoJSON 데이터_23년8월'
+HOTSPOT_FILE = '전국교통사고다발지역표준데이터.csv'
+DAILY_FILE = '도로교통공단_일자별 시군구별 교통사고 건수({year}).csv'
+
+# 원본 다발지역 파일이 없을 때 합성하는 기본 행 수 (scale 1 기준)
+HOTSPOT_BASE_ROWS = 10000
+
+# RSS 측정 주기 (초)
+RSS_INTERVAL = 0.005
+
+# 비교할 때 이보다 작은 시간 차이(초)는 측정 잡음으로 보고 회귀로 판단하지 않음
+MIN_SECONDS_DELTA = 0.05
+# 같은 이유로 이보다 작은 단계별 메모리 증가량 차이(MB)는 회귀로 판단하지 않음
+MIN_RSS_DELTA_MB = 5
+
+# peak_rss_mb: 단계 중 프로세스 RSS의 최댓값 (앞 단계에서 늘어난 메모리 포함)
+# rss_delta_mb: 단계 중 RSS 최댓값 - 단계 시작 시 RSS (그 단계가 더 쓴 메모리)
+METRICS = ['seconds', 'peak_rss_mb', 'rss_delta_mb', 'output_bytes']
+
+# 지표별 측정 잡음 (기준 결과와의 차이가 이보다 작으면 회귀로 판단하지 않음)
+NOISE_FLOOR = {'seconds': MIN_SECONDS_DELTA, 'rss_delta_mb': MIN_RSS_DELTA_MB}
+
+
+# ----------------------------
+# 합성 데이터셋
+# ----------------------------
+
+def _link(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if not os.path.lexists(target):
+        os.symlink(os.path.abspath(source), target)
+
+
+def _daily_years():
+    names = os.listdir(os.path.join(REPO_DIR, DATA_DIR))
+    prefix, suffix = DAILY_FILE.split('{year}')
+    return sorted(int(name[len(prefix):-len(suffix)]) for name in names
+                  if name.startswith(prefix) and name.endswith(suffix))
+
+
+# 일자별 시군구별 CSV를 scale배 행, years개 연도로 늘림
+# 행은 같은 (날짜, 시군구) 행을 반복해서 늘리므로(큐브에서 합산됨) 지역 수는 그대로이고,
+# 원본보다 많은 연도는 원본 연도를 차례로 돌려 쓰며 앞쪽(과거)으로 연도를 붙인다.
+def _write_daily(root, scale, years):
+    source_years = _daily_years()
+    target_years = list(range(source_years[-1] - years + 1, source_years[-1] + 1))
+    for i, year in enumerate(target_years):
+        target = os.path.join(root, DATA_DIR, DAILY_FILE.format(year=year))
+        source_year = year if year in source_years else source_years[i % len(source_years)]
+        source = os.path.join(REPO_DIR, DATA_DIR, DAILY_FILE.format(year=source_year))
+        if scale == 1 and source_year == year:
+            _link(source, target)
+            continue
+        if os.path.exists(target):
+            continue
+
+        df = pd.read_csv(source, encoding='euc-kr')
+        if year % 4 != 0 or (year % 100 == 0 and year % 400 != 0):
+            df = df[~((df['발생월'] == 2) & (df['발생일'] == 29))]
+        df = pd.concat([df] * scale, ignore_index=True)
+        tmp_path = target + '.tmp'
+        df.to_csv(tmp_path, encoding='euc-kr', index=False)
+        os.replace(tmp_path, target)
+
+
+def _polygon_strings(lon, lat, half_size):
+    corners = [(-1, -1), (1, -1), (1, 1), (-1, 1), (-1, -1)]
+    points = ','.join(f'[{{x{i}:.6f}},{{y{i}:.6f}}]' for i in range(len(corners)))
+    template = '{{type:Polygon,coordinates:[[' + points + ']]}}'
+    return [template.format(**{f'x{i}': x + dx * half_size for i, (dx, _) in enumerate(corners)},
+                            **{f'y{i}': y + dy * half_size for i, (_, dy) in enumerate(corners)})
+            for x, y in zip(lon, lat)]
+
+
+# 다발지역 CSV 생성
+# 원본이 있으면 원본 행을 scale배로 반복하면서 위치를 조금씩 옮기고,
+# 없으면 시군구 경계 안쪽의 임의 위치로 HOTSPOT_BASE_ROWS x scale 행을 합성한다.
+def _write_hotspots(root, scale, geojson_path, rng):
+    target = os.path.join(root, DATA_DIR, HOTSPOT_FILE)
+    source = os.path.join(REPO_DIR, DATA_DIR, HOTSPOT_FILE)
+    if os.path.exists(target):
+        return
+    if os.path.exists(source) and scale == 1:
+        _link(source, target)
+        return
+
+    if os.path.exists(source):
+        df = pd.read_csv(source, encoding='euc-kr')
+        df = pd.concat([df] * scale, ignore_index=True)
+        offsets = rng.normal(scale=0.002, size=(len(df), 2))
+        offsets[:len(df) // scale] = 0
+        df['위도'] = df['위도'] + offsets[:, 0]
+        df['경도'] = df['경도'] + offsets[:, 1]
+        df['사고다발지역폴리곤정보'] = _polygon_strings(df['경도'], df['위도'], 0.0005)
+    else:
+        with open(geojson_path, 'r', encoding='utf-8') as f:
+            features = json.load(f)['features']
+        rings = []
+        for feature in features:
+            geometry = feature['geometry']
+            polygon = geometry['coordinates'] if geometry['type'] == 'Polygon' else geometry['coordinates'][0]
+            rings.append(np.asarray(polygon[0], dtype=float)[:, :2])
+
+        n_rows = HOTSPOT_BASE_ROWS * scale
+        feature_ids = rng.integers(len(features), size=n_rows)
+        vertices = np.array([rings[i][rng.integers(len(rings[i]))] for i in feature_ids])
+        centers = np.array([rings[i].mean(axis=0) for i in feature_ids])
+        points = vertices + (centers - vertices) * rng.uniform(0.5, 0.9, size=(n_rows, 1))
+
+        codes = np.array([feature['properties']['SIG_CD'] for feature in features])[feature_ids]
+        names = np.array([feature['properties'].get('SIG_KOR_NM', '') for feature in features])[feature_ids]
+        sido_names = np.array(['시도' + code[:2] for code in codes])
+        df = pd.DataFrame({
+            '사고지역관리번호': np.arange(n_rows),
+            '사고년도': 2020,
+            '사고유형구분': '보행자',
+            '위치코드': [f'{code}{i % 100000:05d}' for i, code in enumerate(codes)],
+            '시도시군구명': [f'{sido} {name}' for sido, name in zip(sido_names, names)],
+            '사고지역위치명': [f'{sido} {name} 지점{i}' for i, (sido, name) in enumerate(zip(sido_names, names))],
+            '사고건수': rng.integers(3, 30, size=n_rows),
+            '사상자수': 5, '사망자수': 0, '중상자수': 1, '경상자수': 3, '부상신고자수': 1,
+            '위도': points[:, 1],
+            '경도': points[:, 0],
+            '사고다발지역폴리곤정보': _polygon_strings(points[:, 0], points[:, 1], 0.0005),
+            '데이터기준일자': '2023-01-01', '제공기관코드': '-', '제공기관명': '-',
+        })
+
+    tmp_path = target + '.tmp'
+    df.to_csv(tmp_path, encoding='euc-kr', index=False)
+    os.replace(tmp_path, target)
+
+
+# scale배 행, years개 연도의 데이터셋 디렉터리를 만들고 경로를 반환 (이미 있으면 재사용)
+# 크기를 늘리지 않는 원본 파일(엑셀, GeoJSON 등)은 심볼릭 링크로 연결한다.
+def build_dataset(scale=1, years=None, seed=0):
+    years = years or len(_daily_years())
+    root = os.path.join(BENCH_DIR, f'data-x{scale}-y{years}')
+    rng = np.random.default_rng(seed)
+
+    for directory in (DATA_DIR, GEO_DIR):
+        for name in os.listdir(os.path.join(REPO_DIR, directory)):
+            if directory == DATA_DIR and (name.startswith(DAILY_FILE.split('{year}')[0]) or name == HOTSPOT_FILE):
+                continue
+            _link(os.path.join(REPO_DIR, directory, name), os.path.join(root, directory, name))
+
+    # app.py가 읽는 원본 시군구 GeoJSON이 없으면 단순화된 버전을 그 이름으로 연결
+    geojson_path = os.path.join(root, GEO_DIR, '법정구역_시군구.geojson')
+    _link(os.path.join(REPO_DIR, GEO_DIR, '법정구역_시군구_simplified.geojson'), geojson_path)
+
+    _write_daily(root, scale, years)
+    _write_hotspots(root, scale, geojson_path, rng)
+    return root
+
+
+# ----------------------------
+# 측정
+# ----------------------------
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# 블록이 실행되는 동안 RSS를 주기적으로 읽어 최댓값을 기록 (start: 블록 시작 시 RSS)
+class RssSampler:
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+# 단계 결과의 크기 (Figure는 직렬화한 JSON 길이, 데이터프레임은 메모리 사용량)
+def output_bytes(value):
+    if value is None:
+        return 0
+    if hasattr(value, 'to_plotly_json'):
+        return len(value.to_json().encode('utf-8'))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(output_bytes(item) for item in value)
+    if hasattr(value, 'values') and isinstance(getattr(value, 'values'), np.ndarray):
+        return int(value.values.nbytes)
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return 0
+
+
+def measure(func):
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - start
+    return value, {'seconds': seconds, 'peak_rss_mb': sampler.peak / 2 ** 20,
+                   'rss_delta_mb': (sampler.peak - sampler.start) / 2 ** 20, 'output_bytes': output_bytes(value)}
+
+
+def _run_app():
+    return runpy.run_path(APP_PATH, run_name='__main__')
+
+
+def _reset(root):
+    from cache import clear_caches
+    from warmup import clear_warmup
+    clear_warmup()
+    clear_caches()
+    shutil.rmtree(os.path.join(root, '.cache'), ignore_errors=True)
+    shutil.rmtree(os.path.join(root, 'static', 'heat'), ignore_errors=True)
+
+
+# 일자별 CSV 전체를 Parquet으로 다시 변환 (pool=False: 현재 프로세스, True: 비용 추정과 관계없이 2개 이상의 워커)
+# 두 단계의 시간 차이로 parallel_loader의 워커 준비 시간과 읽는 속도를 배포 환경에 맞게 정할 수 있다 (set_parallel_cost).
+def _convert_daily(root, pool):
+    import parallel_loader
+    from accident_store import build_daily_cache, discover_daily_files
+    shutil.rmtree(os.path.join(root, '.cache', 'daily'), ignore_errors=True)
+    startup_seconds = parallel_loader.WORKER_STARTUP_SECONDS
+    parallel_loader.set_parallel_cost(startup_seconds=0 if pool else None)
+    try:
+        max_workers = max(2, parallel_loader.default_workers()) if pool else 1
+        return build_daily_cache(discover_daily_files(), max_workers=max_workers)
+    finally:
+        parallel_loader.set_parallel_cost(startup_seconds=startup_seconds)
+
+
+# 대상사고 구분별 화면 위젯의 기본값 (전체 연도, 첫 구분, 첫 항목)
+def _stats_defaults(g):
+    cube = g['load_stats_cube'](g['STATS_PATH'])
+    return (cube.years[0], cube.years[-1]), cube.categories[0], cube.measure_options[0]
+
+
+# app.py의 단계 (이름, 단계가 사용하는 app.py의 이름들, 함수) 목록
+# 원래 요청의 단계와의 대응: df3_combined -> yearly_ingest(큐브),
+# filter_holiday_data / filter_world_cup_data -> event_stats 및 각 그래프, 2018/2022 월별 집계 -> monthly_groupbys
+def app_stages(g):
+    hotspot, geojson, sido_geojson = g['HOTSPOT_PATH'], g['GEOJSON_PATH'], g['SIDO_GEOJSON_PATH']
+    sido = g['selected_sido']
+
+    # 일자별 데이터 스냅샷의 키 (yearly_ingest 단계에서 만든 스냅샷)
+    def daily():
+        return g['open_daily_store']().current().files
+
+    stats = ['load_stats_cube', 'STATS_PATH']
+    return [
+        ('hotspot_csv_load', ['load_hotspots'], lambda: g['load_hotspots'](hotspot)),
+        ('geojson_tiles', ['load_geo_tiles'], lambda: g['load_geo_tiles'](geojson)),
+        ('spatial_index', ['load_district_index'], lambda: (g['load_district_index'](geojson, 'SIG_CD'),
+                                                            g['load_district_index'](sido_geojson, 'CTPRVN_CD'))),
+        ('hotspot_spatial_join', ['locate_hotspots'], lambda: g['locate_hotspots'](hotspot, geojson, sido_geojson)),
+        ('df_grouped', ['summarize_hotspots'], lambda: g['summarize_hotspots'](hotspot, geojson, sido_geojson)),
+        ('ranking_index', ['load_hotspot_ranking'], lambda: g['load_hotspot_ranking'](hotspot, geojson, sido_geojson)),
+        ('national_choropleth', ['national_choropleth'], lambda: g['national_choropleth'](hotspot, geojson, sido_geojson)),
+        ('hotspot_polygons', ['load_hotspot_polygons'], lambda: g['load_hotspot_polygons'](hotspot)),
+        ('sido_choropleth', ['sido_choropleth'], lambda: g['sido_choropleth'](hotspot, geojson, sido_geojson, sido)),
+        ('heatmap', ['heatmap_html'], lambda: g['heatmap_html'](hotspot, geojson, sido_geojson)),
+        ('stats_cube', stats, lambda: g['load_stats_cube'](g['STATS_PATH'])),
+        ('stats_choropleth', ['stats_choropleth'] + stats,
+         lambda: g['stats_choropleth'](g['STATS_PATH'], sido_geojson, *_stats_defaults(g))),
+        ('weekday_hour', ['weekday_hour_figures', 'weekday_hour_paths'],
+         lambda: g['weekday_hour_figures'](g['weekday_hour_paths'])),
+        ('yearly_ingest', ['open_daily_store'], lambda: g['open_daily_store']().current()),
+        ('event_stats', ['load_event_stats', 'open_daily_store'], lambda: g['load_event_stats'](daily())),
+        ('holiday_figures', ['holiday_figure', 'open_daily_store'],
+         lambda: (g['holiday_figure'](daily(), '설날'), g['holiday_figure'](daily(), '추석'))),
+        ('world_cup_figure', ['world_cup_figure', 'open_daily_store'], lambda: g['world_cup_figure'](daily())),
+        ('monthly_groupbys', ['world_cup_monthly_figure', 'open_daily_store'],
+         lambda: g['world_cup_monthly_figure'](daily())),
+    ]
+
+
+# 데이터셋 하나에 대해 앱 전체 실행(처음/재실행)과 단계별 측정
+def run_benchmark(root):
+    results = []
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        _reset(root)
+        _, stats = measure(_run_app)
+        results.append({'stage': 'app_cold_run', **stats})
+        g, stats = measure(_run_app)
+        results.append({'stage': 'app_rerun', **stats})
+
+        _reset(root)
+        stages = app_stages(g) + [
+            ('daily_cache_serial', [], lambda: _convert_daily(root, False)),
+            ('daily_cache_pool', [], lambda: _convert_daily(root, True)),
+        ]
+        for name, names, func in stages:
+            # app.py에 없는 이름을 쓰는 단계만 건너뛰고, 단계 안에서 난 오류는 그대로 실패로 처리
+            missing = [required for required in names if required not in g]
+            if missing:
+                print(f'  {name}: app.py에 {", ".join(missing)} 가 없어 건너뜀', file=sys.stderr)
+                continue
+            _, stats = measure(func)
+            results.append({'stage': name, **stats})
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+# ----------------------------
+# 결과 저장과 비교
+# ----------------------------
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# 여러 번 반복한 측정값 중 시간은 최솟값, 메모리와 크기는 최댓값을 사용
+def _combine(runs):
+    combined = {}
+    for run in runs:
+        for row in run:
+            key = (row['scale'], row['years'], row['stage'])
+            if key not in combined:
+                combined[key] = dict(row)
+            else:
+                combined[key]['seconds'] = min(combined[key]['seconds'], row['seconds'])
+                for metric in ['peak_rss_mb', 'rss_delta_mb', 'output_bytes']:
+                    combined[key][metric] = max(combined[key][metric], row[metric])
+    return list(combined.values())
+
+
+# 기준 결과 대비 threshold(비율) 넘게 나빠진 (규모, 단계, 지표) 목록
+def compare(results, baseline, threshold=0.2):
+    base = {(row['scale'], row['years'], row['stage']): row for row in baseline['results']}
+    regressions = []
+    for row in results['results']:
+        old = base.get((row['scale'], row['years'], row['stage']))
+        if old is None:
+            continue
+        for metric in METRICS:
+            # 이전 형식의 기준 결과에는 rss_delta_mb가 없음
+            if old.get(metric) is None or old[metric] <= 0:
+                continue
+            ratio = row[metric] / old[metric]
+            if ratio > 1 + threshold and row[metric] - old[metric] >= NOISE_FLOOR.get(metric, 0):
+                regressions.append({'scale': row['scale'], 'years': row['years'], 'stage': row['stage'],
+                                    'metric': metric, 'baseline': old[metric], 'current': row[metric],
+                                    'ratio': ratio})
+    return regressions
+
+
+def _print_results(results):
+    table = pd.DataFrame(results['results'])
+    table['seconds'] = table['seconds'].round(3)
+    table['peak_rss_mb'] = table['peak_rss_mb'].round(1)
+    table['rss_delta_mb'] = table['rss_delta_mb'].round(1)
+    print(table.to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='app.py 단계별 성능 측정')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1], help='원본 대비 행 수 배율 (예: 1 10 100)')
+    parser.add_argument('--years', type=int, default=None, help='일자별 데이터 연도 수 (기본: 원본 연도 수)')
+    parser.add_argument('--repeat', type=int, default=1, help='반복 횟수 (시간은 최솟값 사용)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help='결과 JSON 경로')
+    parser.add_argument('--compare', help='비교할 기준 결과 JSON 경로')
+    parser.add_argument('--threshold', type=float, default=0.2, help='회귀로 판단할 증가 비율 (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    # bare mode 실행 경고 숨김
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    sys.path.insert(0, REPO_DIR)
+
+    years = args.years or len(_daily_years())
+    runs = []
+    for _ in range(args.repeat):
+        run = []
+        for scale in args.scales:
+            root = build_dataset(scale, years, args.seed)
+            print(f'[scale x{scale}, {years}년] {root}', file=sys.stderr)
+            run.extend({'scale': scale, 'years': years, **row} for row in run_benchmark(root))
+        runs.append(run)
+
+    results = {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': _combine(runs),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    _print_results(results)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print('회귀: x{scale} {years}년 {stage} {metric}: {baseline:.3f} -> {current:.3f} ({ratio:.2f}배)'.format(**regression))
+        if regressions:
+            return 1
+        print(f'회귀 없음 (기준 {args.compare}, 허용 {args.threshold:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+# ----------------------------
+# 프로세스 전체에서 공유되는 메모이제이션 캐시
+# ----------------------------
+
+# Streamlit은 위젯이 바뀔 때마다 app.py를 처음부터 다시 실행하지만 import된 모듈은 프로세스에 남아 있으므로,
+# 여기에 등록된 캐시는 모든 rerun과 모든 세션에서 공유된다.
+# 캐시된 값(데이터프레임, GeoJSON, Figure)은 여러 세션이 함께 쓰므로 꺼낸 쪽에서 수정하면 안 된다.
+
+
+class LRUCache:
+    def __init__(self, name, maxsize=None):
+        self.name = name
+        self.maxsize = maxsize  # None이면 개수 제한 없음
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    # 값이 없으면 compute()로 계산해서 저장
+    # 같은 키를 여러 세션이 동시에 요청해도 계산은 한 번만 수행된다.
+    def get_or_compute(self, key, compute):
+        found, value = self.get(key)
+        if found:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # compute()가 예외를 던져도 키별 잠금은 지움
+        try:
+            with key_lock:
+                found, value = self.get(key)
+                if found:
+                    return value
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                self.put(key, value)
+        finally:
+            with self._lock:
+                self._key_locks.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cache': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# 이름으로 등록된 캐시 목록 (app.py가 다시 실행되어도 같은 이름이면 같은 캐시를 사용)
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(name, maxsize=None):
+    with _registry_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = LRUCache(name, maxsize)
+        elif maxsize is not None:
+            cache.maxsize = maxsize
+        return cache
+
+
+# 캐시된 함수를 호출할 때마다 불리는 훅 (profiling.py가 rerun별 구간과 캐시 적중 여부를 기록하는 데 사용)
+# hook(캐시 이름, 함수 이름, call)에서 call()은 (값, 캐시 적중 여부)를 반환하며, 훅은 값을 그대로 반환해야 한다.
+_call_hook = None
+
+
+def set_call_hook(hook):
+    global _call_hook
+    _call_hook = hook
+
+
+# 함수 결과를 이름 붙은 캐시에 저장하는 데코레이터
+# key를 지정하지 않으면 인자 자체를 키로 사용하므로 인자는 hashable이어야 한다.
+def memoize(name, maxsize=None, key=None):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = (args, tuple(sorted(kwargs.items())))
+            cache = get_cache(name, maxsize)
+            hook = _call_hook
+            if hook is None:
+                return cache.get_or_compute(cache_key, lambda: func(*args, **kwargs))
+
+            computed = []
+
+            def compute():
+                computed.append(True)
+                return func(*args, **kwargs)
+
+            def call():
+                value = cache.get_or_compute(cache_key, compute)
+                return value, not computed
+
+            return hook(name, func.__name__, call)
+        return wrapper
+    return decorator
+
+
+# 파일 경로와 수정 시각, 크기로 만든 캐시 키 (원본 파일이 바뀌면 키도 바뀐다)
+def file_key(*paths):
+    key = []
+    for path in paths:
+        stat = os.stat(path)
+        key.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+# 캐시별 적중/미스 횟수
+def cache_stats():
+    with _registry_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
+
+
+def clear_caches():
+    with _registry_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# 이벤트 기간(window) 집계 엔진
+# ----------------------------
+
+# 명절, 월드컵, 사용자가 지정한 임의 기간을 모두 (이벤트, 발생년도, 시작일, 종료일) 행으로 이루어진
+# 데이터프레임으로 표현하고, 여러 기간의 통계를 DailyAccidentCube에서 한 번에 계산한다.
+# 시작일과 종료일은 모두 포함하며, 월이나 연도를 넘어가는 기간도 그대로 표현할 수 있다.
+
+WINDOW_COLUMNS = ['이벤트', '발생년도', '시작일', '종료일']
+
+
+def _make_windows(rows):
+    windows = pd.DataFrame(rows, columns=WINDOW_COLUMNS)
+    windows['시작일'] = pd.to_datetime(windows['시작일'])
+    windows['종료일'] = pd.to_datetime(windows['종료일'])
+    return windows
+
+
+# {연도: ['MM-DD', ...]} 형식의 날짜 딕셔너리를 기간으로 변환 (연속된 날짜는 하나의 기간으로 묶음)
+def windows_from_dates(name, dates_by_year):
+    rows = []
+    for year, dates in dates_by_year.items():
+        dates = pd.DatetimeIndex(sorted(pd.Timestamp(f'{year}-{date_str}') for date_str in dates))
+        run_ids = np.cumsum(np.r_[True, np.diff(dates.values).astype('timedelta64[D]').astype(int) != 1])
+        for run_id in np.unique(run_ids):
+            run = dates[run_ids == run_id]
+            rows.append((name, year, run[0], run[-1]))
+    return _make_windows(rows)
+
+
+# [('MM-DD', 'MM-DD'), ...] 형식의 기간 목록을 해당 연도의 기간으로 변환
+# 종료일이 시작일보다 앞서면 (예: '12-20' ~ '01-05') 다음 해로 넘어가는 기간으로 본다.
+def windows_from_ranges(name, ranges, year):
+    rows = []
+    for start_date, end_date in ranges:
+        start = pd.Timestamp(f'{year}-{start_date}')
+        end = pd.Timestamp(f'{year}-{end_date}')
+        if end < start:
+            end = pd.Timestamp(f'{year + 1}-{end_date}')
+        rows.append((name, year, start, end))
+    return _make_windows(rows)
+
+
+# 각 기간과 요일, 길이가 같은 기간을 앞뒤로 1~weeks주 이동시켜 비교 기준 기간을 만듦
+# 기준 기간은 '<이벤트> 기준'이라는 이름으로 같은 발생년도에 묶인다.
+def baseline_windows(windows, weeks=2):
+    shifts = [week for week in range(-weeks, weeks + 1) if week != 0]
+    baseline = pd.concat([windows.assign(시작일=windows['시작일'] + pd.Timedelta(weeks=week),
+                                         종료일=windows['종료일'] + pd.Timedelta(weeks=week))
+                          for week in shifts], ignore_index=True)
+    baseline['이벤트'] = baseline['이벤트'] + ' 기준'
+    return baseline
+
+
+# 기간들을 큐브 날짜 축 위의 (기간 번호, 날짜 위치) 쌍으로 펼침
+# 기간 수만큼 반복하지 않고 np.repeat로 한 번에 계산하며, 큐브 범위를 벗어나는 날짜는 제외한다.
+def _expand(cube, windows):
+    starts = (windows['시작일'].values.astype('datetime64[D]').astype(np.int64) - cube.start)
+    ends = (windows['종료일'].values.astype('datetime64[D]').astype(np.int64) - cube.start)
+    lengths = np.maximum(ends - starts + 1, 0)
+
+    window_ids = np.repeat(np.arange(len(windows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + offsets
+
+    in_range = (positions >= 0) & (positions < len(cube.dates))
+    return window_ids[in_range], positions[in_range]
+
+
+# 모든 기간의 전국 합계를 한 번에 계산
+# 결과는 기간별 한 행이며, 큐브 날짜 범위 안에 있는 일수와 일평균 사고건수를 함께 반환한다.
+def window_stats(cube, windows, measures=None):
+    measures, columns = cube.measure_indices(measures)
+    window_ids, positions = _expand(cube, windows)
+
+    n_windows = len(windows)
+    totals = np.zeros((n_windows, len(columns)), dtype=np.int64)
+    np.add.at(totals, window_ids, cube.daily_totals[np.ix_(positions, columns)])
+
+    stats = windows.reset_index(drop=True).copy()
+    stats['일수'] = np.bincount(window_ids, minlength=n_windows)
+    stats[measures] = totals
+    if '사고건수' in measures:
+        stats['일평균 사고건수'] = stats['사고건수'] / stats['일수'].where(stats['일수'] > 0)
+    return stats
+
+
+# window_stats 결과 중 기간 전체가 큐브 날짜 범위 안에 있는 행만
+# 연도 중간까지만 있는 파일(예: 1~3월)로 만든 큐브에서는 뒤쪽 기간의 일수가 0이나 기간 길이보다 작아
+# 합계가 실제 값이 아니므로 추이 그래프와 비교 표에서 뺀다.
+def complete_windows(stats):
+    lengths = (stats['종료일'] - stats['시작일']).dt.days + 1
+    return stats[stats['일수'] == lengths]
+
+
+# 이벤트 기간과 비교 기준 기간의 일평균 사고건수를 나란히 비교 (이벤트 기간은 데이터가 모두 있는 기간만)
+def compare_with_baseline(cube, windows, weeks=2):
+    event = complete_windows(window_stats(cube, windows, ['사고건수']))
+    baseline = window_stats(cube, baseline_windows(windows, weeks), ['사고건수'])
+
+    baseline['이벤트'] = baseline['이벤트'].str.removesuffix(' 기준')
+    baseline = baseline.groupby(['이벤트', '발생년도'], as_index=False)[['사고건수', '일수']].sum()
+    baseline['기준 일평균 사고건수'] = baseline['사고건수'] / baseline['일수'].where(baseline['일수'] > 0)
+
+    event = event.groupby(['이벤트', '발생년도'], as_index=False)[['사고건수', '일수']].sum()
+    event['일평균 사고건수'] = event['사고건수'] / event['일수'].where(event['일수'] > 0)
+
+    comparison = event.merge(baseline[['이벤트', '발생년도', '기준 일평균 사고건수']], on=['이벤트', '발생년도'], how='left')
+    comparison['기준 대비 비율'] = comparison['일평균 사고건수'] / comparison['기준 일평균 사고건수']
+    return comparison
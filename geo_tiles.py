@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# ----------------------------
+# 시도별로 나누고 단순화한 GeoJSON 타일
+# ----------------------------
+
+# 시군구 GeoJSON 전체(약 2.4MB)를 지도마다 그대로 넘기면 한 시도만 보는 지도에서도 전국 폴리곤이
+# 브라우저로 전송된다. 여기서는 원본을 SIG_CD 앞 2자리(시도 코드)로 나누고, 보여줄 범위에 맞게
+# 단순화 + 좌표 반올림한 버전을 미리 만들어 디스크에 저장해 둔다.
+
+CACHE_DIR = os.path.join('.cache', 'geo')
+# 타일을 만드는 방식이 바뀌면 올려서 예전 타일을 다시 만들게 함
+TILES_VERSION = 2
+
+# 단순화 단계: 이름 -> (Douglas-Peucker 허용 오차(도), 좌표 소수점 자리수)
+# 'national'은 전국 지도용, 'sido'는 시도 하나를 확대해서 보는 지도용
+LEVELS = {
+    'national': (0.003, 3),
+    'sido': (0.001, 4),
+}
+
+# 허용 오차 제곱의 이 배수보다 면적이 작은 섬은 해당 단계에서 그리지 않음
+MIN_AREA_RATIO = 10
+
+
+# Douglas-Peucker 단순화 (허용 오차 이내로 직선에 가까운 점을 제거)
+def _douglas_peucker(points, tolerance):
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        inner = points[first + 1:last]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            distances = np.abs(segment[0] * (inner[:, 1] - start[1]) - segment[1] * (inner[:, 0] - start[0])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            middle = first + 1 + index
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+    return points[keep]
+
+
+# 고리(ring) 하나를 단순화하고 좌표를 반올림 (닫힌 고리를 유지하지 못하면 None)
+def simplify_ring(ring, tolerance, decimals):
+    points = np.asarray(ring, dtype=float)[:, :2]
+    if tolerance > 0 and len(points) > 4:
+        points = _douglas_peucker(points, tolerance)
+    points = np.round(points, decimals)
+
+    # 반올림 후 연속으로 겹치는 점 제거
+    duplicated = np.r_[False, np.all(points[1:] == points[:-1], axis=1)]
+    points = points[~duplicated]
+    if len(points) < 4:
+        return None
+    return points.tolist()
+
+
+# 신발끈 공식으로 구한 고리의 면적 (제곱도 단위)
+def _ring_area(ring):
+    x, y = np.asarray(ring).T
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+# 폴리곤 하나를 단순화 (허용 오차에 비해 너무 작은 섬이나 구멍은 None)
+def _simplify_polygon(polygon, tolerance, decimals):
+    outer = simplify_ring(polygon[0], tolerance, decimals)
+    if outer is None or _ring_area(outer) < MIN_AREA_RATIO * tolerance ** 2:
+        return None
+    holes = [simplify_ring(ring, tolerance, decimals) for ring in polygon[1:]]
+    return [outer] + [hole for hole in holes if hole is not None]
+
+
+# Polygon/MultiPolygon 도형 단순화
+# 너무 작아 사라지는 섬은 제외하되, 도형마다 적어도 가장 큰 폴리곤 하나는 남긴다.
+def simplify_geometry(geometry, tolerance, decimals):
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    simplified = [_simplify_polygon(polygon, tolerance, decimals) for polygon in polygons]
+    simplified = [polygon for polygon in simplified if polygon is not None]
+    if not simplified:
+        largest = max(polygons, key=lambda polygon: _ring_area(polygon[0]))
+        simplified = [_simplify_polygon(largest, 0, decimals) or largest]
+
+    if len(simplified) == 1:
+        return {'type': 'Polygon', 'coordinates': simplified[0]}
+    return {'type': 'MultiPolygon', 'coordinates': simplified}
+
+
+# 원본 내용과 타일을 만드는 설정(형식 버전, 속성 이름, 접두어 길이, 단계별 허용 오차와 자리수, 섬 면적 기준)의 해시
+def _source_hash(geojson_path, id_property, prefix_length):
+    digest = hashlib.sha1()
+    with open(geojson_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(f'{TILES_VERSION},{id_property},{prefix_length},{sorted(LEVELS.items())},{MIN_AREA_RATIO}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+# 원본 GeoJSON으로 단계별, 시도별 타일을 만들어 저장하고 타일이 있는 디렉터리를 반환
+# 원본 내용과 설정의 해시를 디렉터리 이름으로 사용하므로 원본이나 설정이 바뀌면 새로 만들어진다.
+def build_tiles(geojson_path, id_property='SIG_CD', prefix_length=2):
+    tile_dir = os.path.join(CACHE_DIR, _source_hash(geojson_path, id_property, prefix_length))
+    if os.path.exists(os.path.join(tile_dir, 'index.json')):
+        return tile_dir
+
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        geojson = json.load(f)
+
+    index = {'id_property': id_property, 'prefix_length': prefix_length, 'levels': {}}
+    for level, (tolerance, decimals) in LEVELS.items():
+        os.makedirs(os.path.join(tile_dir, level), exist_ok=True)
+        tiles = {}
+        for feature in geojson['features']:
+            feature_id = feature['properties'][id_property]
+            tiles.setdefault(feature_id[:prefix_length], []).append({
+                'type': 'Feature',
+                'properties': {id_property: feature_id},
+                'geometry': simplify_geometry(feature['geometry'], tolerance, decimals),
+            })
+        for prefix, features in tiles.items():
+            _write_json(os.path.join(tile_dir, level, f'{prefix}.geojson'),
+                        {'type': 'FeatureCollection', 'features': features})
+        index['levels'][level] = sorted(tiles)
+
+    _write_json(os.path.join(tile_dir, 'index.json'), index)
+    return tile_dir
+
+
+class GeoTiles:
+    def __init__(self, geojson_path, id_property='SIG_CD', prefix_length=2):
+        self.tile_dir = build_tiles(geojson_path, id_property, prefix_length)
+        with open(os.path.join(self.tile_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.id_property = self.index['id_property']
+        self.prefix_length = self.index['prefix_length']
+        self._tiles = {}
+
+    def tile(self, level, prefix):
+        key = (level, prefix)
+        if key not in self._tiles:
+            path = os.path.join(self.tile_dir, level, f'{prefix}.geojson')
+            if not os.path.exists(path):
+                return []
+            with open(path, 'r', encoding='utf-8') as f:
+                self._tiles[key] = json.load(f)['features']
+        return self._tiles[key]
+
+    # 주어진 지역 코드들을 그리기에 충분한 가장 작은 FeatureCollection
+    # 한 시도 안의 코드만 있으면 시도 단계의 상세 도형을, 여러 시도에 걸치면 전국 단계의 도형을 사용하고,
+    # 어느 경우든 실제로 색칠되는 지역의 도형만 포함한다.
+    def for_codes(self, codes):
+        codes = {str(code) for code in codes}
+        prefixes = sorted({code[:self.prefix_length] for code in codes})
+        level = 'sido' if len(prefixes) == 1 else 'national'
+        features = [feature for prefix in prefixes for feature in self.tile(level, prefix)
+                    if feature['properties'][self.id_property] in codes]
+        return {'type': 'FeatureCollection', 'features': features}
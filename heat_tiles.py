@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from folium.elements import JSCSSMixin
+from folium.map import Layer
+from folium.template import Template
+
+# ----------------------------
+# 히트맵 타일 피라미드
+# ----------------------------
+
+# folium.plugins.HeatMap은 모든 점을 HTML 안에 그대로 넣기 때문에 점이 늘어날수록 페이지가 커진다.
+# 여기서는 점을 확대 단계(zoom)마다 화면 픽셀 기준의 정사각형 칸으로 미리 합산해 웹 지도 타일
+# ({z}/{x}/{y}.json) 파일로 저장하고, 지도는 화면에 보이는 타일만 불러와 그린다.
+# 타일 하나에는 최대 (TILE_SIZE / BIN_SIZE)^2 개의 칸만 들어가므로 원본 점의 개수와 관계없이
+# 페이지 크기와 브라우저가 그리는 점의 수가 일정하다.
+
+# 타일은 Streamlit 정적 파일 폴더(static, .streamlit/config.toml의 enableStaticServing) 아래에 만들어
+# 앱 서버가 /app/static/heat/... 주소로 그대로 제공한다. (브라우저가 서버와 다른 컴퓨터여도 같은 주소로 불러옴)
+# Streamlit은 static 밖을 가리키는 심볼릭 링크를 제공하지 않으므로 .cache가 아니라 이 폴더에 직접 만든다.
+CACHE_DIR = os.path.join('static', 'heat')
+STATIC_URL_PATH = 'app/static/heat'
+
+TILE_SIZE = 256
+# 합산 칸 크기 (픽셀) -> 타일 하나에 16 x 16 칸
+BIN_SIZE = 16
+# 타일을 만드는 확대 단계 범위 (MAX_ZOOM보다 더 확대하면 MAX_ZOOM 타일을 그대로 사용)
+MIN_ZOOM = 5
+MAX_ZOOM = 13
+
+# 칸 합계 중 이 분위수를 확대 단계별 최대 세기로 사용 (극단적으로 큰 칸 하나 때문에 나머지가 옅어지지 않도록)
+MAX_QUANTILE = 0.99
+
+
+# 위도/경도를 Web Mercator 전역 좌표(0~1)로 변환
+def _world_coordinates(lat, lon):
+    lat = np.clip(np.radians(lat), -1.4844, 1.4844)
+    x = (np.asarray(lon, dtype=float) + 180) / 360
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+    return x, y
+
+
+def _source_hash(lat, lon, weight):
+    digest = hashlib.sha1()
+    for values in (lat, lon, weight):
+        digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    digest.update(f'{TILE_SIZE},{BIN_SIZE},{MIN_ZOOM},{MAX_ZOOM}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+# 한 확대 단계의 칸별 합계 -> (타일 x, 타일 y, 칸 위도, 칸 경도, 칸 합계)
+# 칸의 위치는 칸 중심이 아니라 칸에 속한 점들의 가중 평균 위치를 사용해 확대해도 위치가 크게 어긋나지 않게 한다.
+def _bin_points(x, y, lat, lon, weight, zoom):
+    bins_per_axis = (TILE_SIZE // BIN_SIZE) << zoom
+    bin_x = np.minimum((x * bins_per_axis).astype(np.int64), bins_per_axis - 1)
+    bin_y = np.minimum((y * bins_per_axis).astype(np.int64), bins_per_axis - 1)
+    bins, inverse = np.unique(bin_x * bins_per_axis + bin_y, return_inverse=True)
+
+    totals = np.bincount(inverse, weights=weight, minlength=len(bins))
+    safe_totals = np.where(totals > 0, totals, 1)
+    bin_lat = np.bincount(inverse, weights=lat * weight, minlength=len(bins)) / safe_totals
+    bin_lon = np.bincount(inverse, weights=lon * weight, minlength=len(bins)) / safe_totals
+
+    bins_per_tile = TILE_SIZE // BIN_SIZE
+    tile_x = bins // bins_per_axis // bins_per_tile
+    tile_y = bins % bins_per_axis // bins_per_tile
+    return tile_x, tile_y, bin_lat, bin_lon, totals
+
+
+# 점(위도, 경도, 가중치)으로 타일 피라미드를 만들어 저장하고 타일이 있는 디렉터리를 반환
+# 입력 값의 해시를 디렉터리 이름으로 사용하므로 같은 점들에 대해서는 한 번만 만들어진다.
+def build_heat_tiles(lat, lon, weight=None):
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    weight = np.ones(len(lat)) if weight is None else np.asarray(weight, dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(weight))
+    lat, lon, weight = lat[valid], lon[valid], weight[valid]
+
+    tile_dir = os.path.join(CACHE_DIR, _source_hash(lat, lon, weight))
+    if os.path.exists(os.path.join(tile_dir, 'index.json')):
+        return tile_dir
+
+    x, y = _world_coordinates(lat, lon)
+    index = {'min_zoom': MIN_ZOOM, 'max_zoom': MAX_ZOOM, 'bounds': {}, 'max': {}}
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        tile_x, tile_y, bin_lat, bin_lon, totals = _bin_points(x, y, lat, lon, weight, zoom)
+        if not len(totals):
+            continue
+
+        # 같은 타일의 칸끼리 모아서 타일 파일 하나로 저장
+        order = np.lexsort((tile_y, tile_x))
+        tile_x, tile_y = tile_x[order], tile_y[order]
+        points = np.column_stack([np.round(bin_lat[order], 5), np.round(bin_lon[order], 5), totals[order]]).tolist()
+        starts = np.flatnonzero(np.r_[True, (np.diff(tile_x) != 0) | (np.diff(tile_y) != 0)])
+        ends = np.r_[starts[1:], len(points)]
+        for start, end in zip(starts, ends):
+            column_dir = os.path.join(tile_dir, str(zoom), str(tile_x[start]))
+            os.makedirs(column_dir, exist_ok=True)
+            _write_json(os.path.join(column_dir, f'{tile_y[start]}.json'), points[start:end])
+
+        index['bounds'][zoom] = [int(tile_x.min()), int(tile_y.min()), int(tile_x.max()), int(tile_y.max())]
+        index['max'][zoom] = float(np.quantile(totals, MAX_QUANTILE))
+
+    index['center'] = [float(np.average(lat, weights=weight)), float(np.average(lon, weights=weight))] if weight.sum() > 0 else None
+    _write_json(os.path.join(tile_dir, 'index.json'), index)
+    return tile_dir
+
+
+def load_heat_index(tile_dir):
+    with open(os.path.join(tile_dir, 'index.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Streamlit 앱 서버에서 타일 폴더의 주소 (서버 주소 없이 /로 시작하는 경로, base_url_path: server.baseUrlPath)
+def static_tile_url(base_url_path=''):
+    return '/' + '/'.join(part for part in [base_url_path.strip('/'), STATIC_URL_PATH] if part)
+
+
+# ----------------------------
+# 타일을 불러와 그리는 folium 히트맵 레이어
+# ----------------------------
+
+class TiledHeatMap(JSCSSMixin, Layer):
+    # 지도를 움직이거나 확대/축소할 때마다 화면에 보이는 타일만 받아서 하나의 L.heatLayer로 그린다.
+    # 받은 타일은 브라우저 메모리에 보관해 같은 타일을 다시 요청하지 않으며,
+    # 데이터 범위를 벗어난 타일이나 없는 타일(404)은 빈 타일로 처리한다.
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.heatLayer([], {{ this.options|tojavascript }});
+            (function(layer, tileUrl, index) {
+                var tiles = {};
+                function fetchTile(z, x, y) {
+                    var key = z + '/' + x + '/' + y;
+                    if (!(key in tiles)) {
+                        tiles[key] = fetch(tileUrl + '/' + key + '.json')
+                            .then(function(response) { return response.ok ? response.json() : []; })
+                            .catch(function() { return []; });
+                    }
+                    return tiles[key];
+                }
+                function update() {
+                    var map = layer._map;
+                    if (!map) { return; }
+                    var zoom = Math.max(index.min_zoom, Math.min(index.max_zoom, map.getZoom()));
+                    var bounds = index.bounds[zoom];
+                    if (!bounds) { layer.setLatLngs([]); return; }
+                    var scale = Math.pow(2, zoom - map.getZoom()) / {{ this.tile_size }};
+                    var pixels = map.getPixelBounds();
+                    var requests = [];
+                    for (var x = Math.max(bounds[0], Math.floor(pixels.min.x * scale)); x <= Math.min(bounds[2], Math.floor(pixels.max.x * scale)); x++) {
+                        for (var y = Math.max(bounds[1], Math.floor(pixels.min.y * scale)); y <= Math.min(bounds[3], Math.floor(pixels.max.y * scale)); y++) {
+                            requests.push(fetchTile(zoom, x, y));
+                        }
+                    }
+                    var requestedZoom = map.getZoom();
+                    Promise.all(requests).then(function(results) {
+                        if (map.getZoom() !== requestedZoom) { return; }
+                        layer.setOptions({max: index.max[zoom]});
+                        layer.setLatLngs([].concat.apply([], results));
+                    });
+                }
+                layer.on('add', function() {
+                    layer._map.on('moveend', update);
+                    update();
+                });
+                layer.on('remove', function(e) { e.target._map && e.target._map.off('moveend', update); });
+            })({{ this.get_name() }}, {{ this.tile_url|tojson }}, {{ this.index|tojson }});
+        {% endmacro %}
+        """
+    )
+
+    default_js = [
+        (
+            'leaflet-heat.js',
+            'https://cdn.jsdelivr.net/gh/python-visualization/folium@main/folium/templates/leaflet_heat.min.js',
+        ),
+    ]
+
+    # tile_url: 타일 디렉터리의 URL (static_tile_url() + 디렉터리 이름, 또는 HTML 파일 기준 상대 경로)
+    # index: load_heat_index로 읽은 타일 정보 (확대 단계별 타일 범위와 최대 세기)
+    def __init__(self, tile_url, index, name=None, min_opacity=0.5, radius=15, blur=25,
+                 gradient=None, overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'TiledHeatMap'
+        self.tile_url = tile_url.rstrip('/')
+        self.index = index
+        self.tile_size = TILE_SIZE
+        # 칸 합계를 이미 확대 단계별로 계산했으므로 leaflet.heat의 확대 단계별 세기 보정은 끔 (maxZoom: 1)
+        self.options = {'minOpacity': min_opacity, 'maxZoom': 1, 'radius': radius, 'blur': blur}
+        if gradient is not None:
+            self.options['gradient'] = gradient
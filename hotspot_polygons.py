@@ -0,0 +1,196 @@
+import json
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# 사고다발지역폴리곤정보 파싱
+# ----------------------------
+
+# 원본 '사고다발지역폴리곤정보'는 {type:Polygon,coordinates:[[[x,y],...]]} 처럼 속성명과 문자열 값에
+# 따옴표가 없는 JSON 비슷한 문자열이다. 행마다 정규식과 json.loads를 호출하지 않고,
+# 컬럼 전체를 하나의 문자열로 이어 붙여 정규식 치환과 JSON 파싱을 한 번씩만 수행한다.
+# 파싱 결과는 중첩 리스트 대신 GeoArrow 방식의 평평한 좌표 배열과 오프셋 배열로 보관한다.
+
+# 속성명을 이중 따옴표로 감싸기 ({ 또는 , 바로 뒤의 영문 이름만 대상으로 함)
+_KEY_PATTERN = re.compile(r'([{,])\s*([A-Za-z_]\w*)\s*:')
+# Polygon과 같은 문자열 값을 이중 따옴표로 감싸기
+_VALUE_PATTERN = re.compile(r':\s*([A-Za-z_]\w*)\s*(?=[,}])')
+
+# 행 구분자 (폴리곤 문자열 안에 나오지 않는 제어 문자)
+_ROW_SEPARATOR = '\x1e'
+
+
+# 폴리곤 문자열들을 유효한 JSON 문자열로 일괄 변환
+def repair_polygon_strings(polygon_strings):
+    text = _ROW_SEPARATOR.join(polygon_strings)
+    text = _KEY_PATTERN.sub(r'\1"\2":', text)
+    text = _VALUE_PATTERN.sub(r':"\1"', text)
+    return text.split(_ROW_SEPARATOR)
+
+
+def _decode(repaired):
+    try:
+        return json.loads('[' + ','.join(repaired) + ']')
+    except json.JSONDecodeError:
+        pass
+
+    # 잘못된 행이 섞여 있으면 그 행만 빈 도형으로 처리
+    geometries = []
+    for polygon_str in repaired:
+        try:
+            geometries.append(json.loads(polygon_str))
+        except json.JSONDecodeError:
+            geometries.append(None)
+    return geometries
+
+
+class PolygonArray:
+    # coords: (점 개수, 2) 배열 [경도, 위도]
+    # ring_offsets[i]:ring_offsets[i+1]       -> i번째 고리의 점 범위
+    # polygon_offsets[j]:polygon_offsets[j+1] -> j번째 폴리곤의 고리 범위
+    # geometry_offsets[k]:geometry_offsets[k+1] -> k번째 행의 폴리곤 범위 (비어 있으면 파싱 실패)
+    def __init__(self, coords, ring_offsets, polygon_offsets, geometry_offsets):
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.polygon_offsets = polygon_offsets
+        self.geometry_offsets = geometry_offsets
+
+    def __len__(self):
+        return len(self.geometry_offsets) - 1
+
+    @property
+    def is_valid(self):
+        return np.diff(self.geometry_offsets) > 0
+
+    # 행별 외곽 고리(첫 번째 폴리곤의 첫 번째 고리) 꼭짓점 평균 위치 (파싱 실패한 행은 NaN)
+    def centroids(self):
+        first_polygons = self.geometry_offsets[:-1].clip(max=len(self.polygon_offsets) - 1)
+        first_rings = self.polygon_offsets[first_polygons].clip(max=len(self.ring_offsets) - 2)
+        starts = self.ring_offsets[first_rings]
+        ends = self.ring_offsets[first_rings + 1]
+
+        cumulative = np.vstack([np.zeros((1, 2)), np.cumsum(self.coords, axis=0)])
+        centroids = (cumulative[ends] - cumulative[starts]) / np.maximum(ends - starts, 1)[:, None]
+        centroids[~self.is_valid] = np.nan
+        return centroids
+
+    # k번째 행을 GeoJSON geometry 딕셔너리로 변환 (decimals를 주면 좌표를 반올림)
+    def geometry(self, k, decimals=None):
+        first_ring = self.polygon_offsets[self.geometry_offsets[k]]
+        first_point = self.ring_offsets[first_ring]
+        last_point = self.ring_offsets[self.polygon_offsets[self.geometry_offsets[k + 1]]]
+        coords = self.coords[first_point:last_point]
+        if decimals is not None:
+            coords = np.round(coords, decimals)
+
+        polygons = []
+        for j in range(self.geometry_offsets[k], self.geometry_offsets[k + 1]):
+            rings = [coords[self.ring_offsets[i] - first_point:self.ring_offsets[i + 1] - first_point].tolist()
+                     for i in range(self.polygon_offsets[j], self.polygon_offsets[j + 1])]
+            polygons.append(rings)
+        if len(polygons) == 1:
+            return {'type': 'Polygon', 'coordinates': polygons[0]}
+        return {'type': 'MultiPolygon', 'coordinates': polygons}
+
+
+# 괄호 깊이로 구조를 읽는 빠른 경로
+# 컬럼 전체를 하나의 바이트 배열로 보고 '[' 와 ']' 의 누적 합으로 각 문자의 중첩 깊이를 구한다.
+# 행마다 가장 깊은 '['가 점, 그보다 한 단계 얕은 것이 고리, 두 단계 얕은 것이 폴리곤이므로
+# (Polygon은 깊이 3, MultiPolygon은 깊이 4) 파이썬 반복문 없이 오프셋 배열을 만들 수 있다.
+# 괄호 짝이 맞지 않거나 좌표가 2차원이 아니면 None을 반환해 JSON 경로로 넘긴다.
+def _tokenize(polygon_strings):
+    text = _ROW_SEPARATOR.join(polygon_strings) + _ROW_SEPARATOR
+    chars = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    is_open = chars == ord('[')
+    depth = np.cumsum(is_open.astype(np.int32) - (chars == ord(']')))
+
+    separators = np.flatnonzero(chars == ord(_ROW_SEPARATOR))
+    if np.any(depth[separators] != 0):
+        return None
+    row_starts = np.r_[0, separators[:-1] + 1]
+    row_ids = np.repeat(np.arange(len(row_starts)), np.diff(np.r_[row_starts, len(chars)]))
+
+    # 행별 가장 깊은 괄호 깊이 (3: Polygon, 4: MultiPolygon, 그 외는 파싱 실패로 처리)
+    leaf_depth = np.maximum.reduceat(depth, row_starts)
+    leaf_depth[(leaf_depth < 3) | (leaf_depth > 4)] = -10
+    char_leaf = leaf_depth[row_ids]
+
+    point_opens = is_open & (depth == char_leaf)
+    ring_opens = is_open & (depth == char_leaf - 1)
+    polygon_opens = is_open & (depth == char_leaf - 2)
+
+    # 점 내부의 문자(숫자와 쉼표)만 남기고 점을 여는 '['는 쉼표로 바꿔 숫자 목록으로 읽음
+    number_chars = chars[depth == char_leaf].copy()
+    number_chars[number_chars == ord('[')] = ord(',')
+    values = np.fromstring(number_chars[1:].tobytes().decode('ascii', errors='replace'), dtype=float, sep=',')
+
+    n_points = int(point_opens.sum())
+    if len(values) != 2 * n_points:
+        return None
+    coords = values.reshape(-1, 2)
+
+    # 각 점/고리/폴리곤을 여는 위치를 기준으로 상위 구조의 시작 번호를 찾음
+    point_positions = np.flatnonzero(point_opens)
+    ring_positions = np.flatnonzero(ring_opens)
+    polygon_positions = np.flatnonzero(polygon_opens)
+    ring_offsets = np.r_[np.searchsorted(point_positions, ring_positions), n_points]
+    polygon_offsets = np.r_[np.searchsorted(ring_positions, polygon_positions), len(ring_positions)]
+    geometry_offsets = np.r_[np.searchsorted(polygon_positions, row_starts), len(polygon_positions)]
+    return PolygonArray(coords, ring_offsets.astype(np.int64), polygon_offsets.astype(np.int64),
+                        geometry_offsets.astype(np.int64))
+
+
+# 정규식으로 JSON을 복구한 뒤 json.loads로 읽는 느린 경로
+def _parse_json(polygon_strings):
+    geometries = _decode(repair_polygon_strings(polygon_strings))
+
+    # Polygon과 MultiPolygon을 모두 폴리곤 목록으로 맞춤
+    polygons_per_row = []
+    for geometry in geometries:
+        if not isinstance(geometry, dict):
+            polygons_per_row.append([])
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons_per_row.append(geometry['coordinates'])
+        else:
+            polygons_per_row.append([geometry['coordinates']])
+
+    polygons = [polygon for row in polygons_per_row for polygon in row]
+    rings = [ring for polygon in polygons for ring in polygon]
+    coords = np.array([point[:2] for point in chain.from_iterable(rings)], dtype=float).reshape(-1, 2)
+    ring_offsets = np.r_[0, np.cumsum([len(ring) for ring in rings])].astype(np.int64)
+    polygon_offsets = np.r_[0, np.cumsum([len(polygon) for polygon in polygons])].astype(np.int64)
+    geometry_offsets = np.r_[0, np.cumsum([len(row) for row in polygons_per_row])].astype(np.int64)
+    return PolygonArray(coords, ring_offsets, polygon_offsets, geometry_offsets)
+
+
+# '사고다발지역폴리곤정보' 컬럼 전체를 PolygonArray로 변환
+def parse_polygons(polygon_strings):
+    polygon_strings = pd.Series(polygon_strings).fillna('').astype(str).tolist()
+    if not polygon_strings:
+        return PolygonArray(np.zeros((0, 2)), *[np.zeros(1, dtype=np.int64)] * 3)
+    polygons = _tokenize(polygon_strings)
+    if polygons is None:
+        polygons = _parse_json(polygon_strings)
+    return polygons
+
+
+# 다발지역 폴리곤과 속성으로 GeoJSON FeatureCollection 생성
+# properties의 인덱스는 polygons의 행 번호여야 하며(원본 데이터프레임을 필터링한 결과를 그대로 넘기면 됨),
+# 각 Feature에는 행 번호를 'id' 속성으로 넣어 Plotly choropleth의 featureidkey로 사용할 수 있게 한다.
+def to_feature_collection(polygons, properties, decimals=None):
+    is_valid = polygons.is_valid
+    # 컬럼이 없는 데이터프레임의 to_dict('records')는 빈 목록이므로 행 수만큼 빈 속성을 사용
+    records = properties.to_dict('records') if len(properties.columns) else [{}] * len(properties)
+    features = []
+    for k, record in zip(properties.index, records):
+        if not is_valid[k]:
+            continue
+        features.append({
+            'type': 'Feature',
+            'geometry': polygons.geometry(k, decimals),
+            'properties': {'id': int(k), **record},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# 순위표용 정렬 인덱스
+# ----------------------------
+
+# 데이터를 불러올 때 값 기준 내림차순 정렬을 한 번만 해 두고, 그룹(예: 시도)별로 정렬된 행 위치와
+# 각 그룹의 시작 위치(offsets)를 저장한다. 이후 전국 Top N, 그룹별 Top N, 그룹에 속한 전체 행은
+# 다시 정렬하거나 전체 행을 훑지 않고 구간을 잘라서 바로 얻는다.
+# 같은 값끼리는 원래 행 순서를 유지한다 (stable 정렬).
+
+
+class RankingIndex:
+    # group_column이 없으면 전국 순위만, 있으면 그룹별 순위도 만든다.
+    # top_k 이하의 Top N은 미리 잘라 둔 데이터프레임에서 바로 반환한다.
+    def __init__(self, df, value_column, group_column=None, top_k=20):
+        self.df = df
+        self.top_k = top_k
+        self.order = np.argsort(-df[value_column].to_numpy(), kind='stable')
+        self._top = df.iloc[self.order[:top_k]]
+
+        # 그룹 순서는 데이터에 처음 나온 순서 (pd.unique와 같음)
+        self.groups = []
+        self._group_ids = {}
+        self._group_top = []
+        if group_column is None:
+            return
+
+        codes, groups = pd.factorize(df[group_column])
+        self.groups = list(groups)
+        self._group_ids = {group: i for i, group in enumerate(self.groups)}
+        ranked_codes = codes[self.order]
+        valid = ranked_codes >= 0
+        self.group_order = self.order[valid][np.argsort(ranked_codes[valid], kind='stable')]
+        self.group_offsets = np.r_[0, np.cumsum(np.bincount(codes[codes >= 0], minlength=len(groups)))]
+        self._group_top = [df.iloc[self.group_order[start:min(start + top_k, end)]]
+                           for start, end in zip(self.group_offsets[:-1], self.group_offsets[1:])]
+
+    # 전국 상위 k개 행
+    def top(self, k=None):
+        k = self.top_k if k is None else k
+        if k <= self.top_k:
+            return self._top.head(k)
+        return self.df.iloc[self.order[:k]]
+
+    # 그룹 안의 상위 k개 행 (없는 그룹이면 빈 데이터프레임)
+    def group_top(self, group, k=None):
+        k = self.top_k if k is None else k
+        if group not in self._group_ids:
+            return self.df.iloc[:0]
+        if k <= self.top_k:
+            return self._group_top[self._group_ids[group]].head(k)
+        start = self.group_offsets[self._group_ids[group]]
+        return self.df.iloc[self.group_order[start:min(start + k, self.group_offsets[self._group_ids[group] + 1])]]
+
+    # 그룹에 속한 모든 행 (값 기준 내림차순)
+    def group_rows(self, group):
+        if group not in self._group_ids:
+            return self.df.iloc[:0]
+        group_id = self._group_ids[group]
+        return self.df.iloc[self.group_order[self.group_offsets[group_id]:self.group_offsets[group_id + 1]]]
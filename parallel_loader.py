@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# ----------------------------
+# 여러 원본 파일을 프로세스 풀로 동시에 읽기
+# ----------------------------
+
+# euc-kr 디코딩, CSV 파싱, xlrd의 .xls 파싱은 CPU를 쓰면서 GIL을 잡고 있어 스레드로는 빨라지지 않는다.
+# 서로 독립적인 파일들은 별도 프로세스에서 읽고, 결과는 완료 순서와 관계없이 입력한 파일 순서대로 돌려준다.
+# 작업 함수는 워커 프로세스에서 불러올 수 있도록 모듈의 최상위 함수여야 한다 (app.py 안의 함수는 불가).
+
+TIMING_COLUMNS = ['파일', '작업', '소요시간(초)', '프로세스']
+
+# 프로세스 풀을 쓸지 정하는 비용 추정값 (set_parallel_cost로 바꿀 수 있음)
+# 워커를 띄우고 pandas, pyarrow를 불러오는 시간(초): 코어 하나에서 워커 2개가 1.2초 -> 워커마다 약 0.6초이고,
+# 코어가 여러 개면 워커들이 동시에 준비하므로 풀 하나에 약 0.6초로 본다.
+WORKER_STARTUP_SECONDS = 0.6
+# 한 프로세스에서 원본 파일을 읽는 속도(바이트/초): 일자별 CSV 8개(13.3MB)의 Parquet 변환이 1.2초 -> 약 11MB/초
+PARSE_BYTES_PER_SECOND = 11 * 2 ** 20
+
+# 파일별 소요 시간 기록 (같은 파일을 다시 읽으면 가장 최근 기록으로 교체)
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# 실제 배포 환경에서 측정한 값으로 비용 추정값을 바꿈 (benchmark.py의 daily_cache_serial / daily_cache_pool 단계 참고)
+def set_parallel_cost(startup_seconds=None, bytes_per_second=None):
+    global WORKER_STARTUP_SECONDS, PARSE_BYTES_PER_SECOND
+    if startup_seconds is not None:
+        WORKER_STARTUP_SECONDS = startup_seconds
+    if bytes_per_second is not None:
+        PARSE_BYTES_PER_SECOND = bytes_per_second
+
+
+# 워커 workers개로 나눠 읽어 줄어드는 시간이 워커를 준비하는 시간보다 길 때만 프로세스 풀을 사용
+def worth_parallel(total_bytes, workers):
+    if workers <= 1:
+        return False
+    serial_seconds = total_bytes / PARSE_BYTES_PER_SECOND
+    return serial_seconds * (1 - 1 / workers) > WORKER_STARTUP_SECONDS
+
+
+# Streamlit 서버처럼 스레드가 여러 개인 프로세스에서 fork하면 잠금 상태가 복사되어 멈출 수 있으므로
+# 가능하면 forkserver, 아니면 spawn으로 워커를 만든다.
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _run_timed(path, func, args):
+    start = time.perf_counter()
+    result = func(path, *args)
+    return result, time.perf_counter() - start, os.getpid()
+
+
+def _record(func, path, seconds, pid):
+    with _timings_lock:
+        _timings[path] = (path, func.__name__, round(seconds, 3), pid)
+
+
+# items의 각 값에 func(item, *args)를 적용한 결과 목록 (items와 같은 순서)
+# 워커 프로세스는 여러 작업에 재사용되므로, 워커마다 한 번만 하는 준비 작업은 func 안에서 모듈 전역에 저장해 두면 된다.
+# 작업이 하나뿐이거나 워커가 하나이면 현재 프로세스에서 차례로 실행한다.
+def map_in_parallel(func, items, *args, max_workers=None):
+    items = list(items)
+    workers = min(len(items), max_workers or default_workers())
+    if workers <= 1:
+        return [func(item, *args) for item in items]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+        futures = [pool.submit(func, item, *args) for item in items]
+        return [future.result() for future in futures]
+
+
+# paths의 각 파일에 func(path, *args)를 적용한 결과 목록 (paths와 같은 순서)
+# 파일이 하나뿐이거나, 워커가 하나이거나, 나눠 읽어도 워커 준비 시간만큼 빨라지지 않으면(worth_parallel) 현재 프로세스에서 차례로 실행한다.
+def load_in_parallel(func, paths, *args, max_workers=None):
+    paths = list(paths)
+    workers = min(len(paths), max_workers or default_workers())
+    if not worth_parallel(sum(os.path.getsize(path) for path in paths), workers):
+        max_workers = 1
+    outputs = map_in_parallel(_run_timed, paths, func, args, max_workers=max_workers)
+
+    results = []
+    for path, (result, seconds, pid) in zip(paths, outputs):
+        _record(func, path, seconds, pid)
+        results.append(result)
+    return results
+
+
+# 지금까지 읽은 파일별 소요 시간 표
+def load_timings():
+    with _timings_lock:
+        rows = list(_timings.values())
+    return pd.DataFrame(rows, columns=TIMING_COLUMNS)
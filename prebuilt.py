@@ -0,0 +1,94 @@
+import glob
+import inspect
+import json
+import os
+import threading
+from functools import wraps
+
+import plotly.graph_objects as go
+
+from cache import file_key
+
+# ----------------------------
+# 미리 만들어 둔 정적 번들의 Figure 재사용
+# ----------------------------
+
+# static_export.py가 만든 번들(BUNDLE_DIR)의 manifest.json에는 Figure를 만든 함수 이름과 인자(키),
+# 저장된 파일, 그리고 만들 당시 입력 파일(함수가 정의된 폴더의 모든 모듈 + 인자로 받은 파일)의 수정 시각과 크기가 들어 있다.
+# prebuilt_figure로 감싼 함수는 입력 파일이 그때와 같으면 계산하지 않고 번들의 Figure를 불러오고,
+# 번들이 없거나 입력 파일이나 코드가 바뀌었으면 원래 함수로 계산한다.
+# 번들의 Figure는 GeoJSON을 assets 경로로 참조하므로 불러올 때 다시 Figure 안에 넣는다.
+
+BUNDLE_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# 번들을 만드는 동안에는 이전 번들을 재사용하지 않도록 끔 (static_export.py)
+_enabled = True
+
+_manifest = (None, None)
+_manifest_lock = threading.Lock()
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = enabled
+
+
+# Figure의 입력 파일 목록: 함수가 정의된 폴더의 모든 .py 파일 + 인자 중 파일 경로 (튜플/리스트 안의 경로 포함)
+# app.py가 부르는 geo_tiles.py, hotspot_polygons.py 등의 코드가 바뀌어도 번들의 Figure를 쓰지 않도록 모듈 전체를 포함한다.
+def source_files(func, args):
+    code_dir = os.path.dirname(os.path.abspath(inspect.unwrap(func).__code__.co_filename))
+    paths = sorted(glob.glob(os.path.join(code_dir, '*.py')))
+    for arg in args:
+        for item in (arg if isinstance(arg, (tuple, list)) else [arg]):
+            if isinstance(item, str) and os.path.isfile(item):
+                paths.append(item)
+    return paths
+
+
+# 입력 파일의 (수정 시각, 크기) 목록 (경로는 실행 위치에 따라 달라질 수 있어 제외)
+def fingerprint(func, args):
+    return [[mtime, size] for _, mtime, size in file_key(*source_files(func, args))]
+
+
+def figure_key(func, args):
+    return json.dumps([inspect.unwrap(func).__name__, list(args)], ensure_ascii=False)
+
+
+def load_manifest(bundle_dir=BUNDLE_DIR):
+    global _manifest
+    path = os.path.join(bundle_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    key = file_key(path)
+    with _manifest_lock:
+        if _manifest[0] == key:
+            return _manifest[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    with _manifest_lock:
+        _manifest = (key, manifest)
+    return manifest
+
+
+def read_figure(bundle_dir, relative_path):
+    with open(os.path.join(bundle_dir, relative_path), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for trace in data.get('data', []):
+        if isinstance(trace.get('geojson'), str):
+            with open(os.path.join(bundle_dir, trace['geojson']), 'r', encoding='utf-8') as f:
+                trace['geojson'] = json.load(f)
+    return go.Figure(data)
+
+
+# Figure(또는 Figure 튜플)를 반환하는 함수를 감싸 번들에 같은 입력으로 만든 Figure가 있으면 그것을 반환
+def prebuilt_figure(func):
+    @wraps(func)
+    def wrapper(*args):
+        manifest = load_manifest() if _enabled else None
+        entry = manifest['figures'].get(figure_key(func, args)) if manifest else None
+        if entry is None or entry['inputs'] != fingerprint(func, args):
+            return func(*args)
+        figures = tuple(read_figure(BUNDLE_DIR, path) for path in entry['files'])
+        return figures if entry['tuple'] else figures[0]
+    return wrapper
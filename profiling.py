@@ -0,0 +1,321 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import pyarrow as pa
+
+from cache import set_call_hook
+
+# ----------------------------
+# rerun별 구간(span) 측정
+# ----------------------------
+
+# 앱의 섹션(Q1~Q5), 캐시된 불러오기/집계 함수, 화면 요소 출력을 이름 붙은 구간으로 기록한다.
+# 구간마다 소요 시간, 처리한 행 수, 메모리(RSS) 변화, 화면 요소의 전송 크기, 캐시 적중 여부를 남기고
+# rerun이 끝나면 표, JSON 로그(한 줄에 구간 하나), Chrome trace(chrome://tracing, Perfetto) 형식으로 내보낸다.
+# Streamlit은 세션의 스크립트를 별도 스레드에서 실행하므로 측정 중인 rerun은 스레드별로 관리하며,
+# 측정 중이 아닌 스레드(다른 세션, 워커 스레드)에서는 모든 기록 함수가 아무것도 하지 않는다.
+
+SPAN_COLUMNS = ['구간', '종류', '세부', '깊이', '시작(ms)', '소요시간(ms)', '행 수', '메모리 변화(MB)', '전송 크기(KB)', '캐시']
+CACHE_COLUMNS = ['캐시', '적중', '다시 계산', '다시 계산 시간(ms)']
+RUN_COLUMNS = ['rerun', '시작 시각', '소요시간(ms)', '캐시 적중', '다시 계산', '전송 크기(KB)']
+
+# 보관할 최근 rerun 기록 수 (프로세스 전체)
+RUN_HISTORY = 20
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_run_ids = itertools.count(1)
+_history = deque(maxlen=RUN_HISTORY)
+_history_lock = threading.Lock()
+
+# 캐시에서 꺼낸 Figure/데이터프레임은 rerun마다 같은 객체이므로 전송 크기를 객체별로 한 번만 계산
+# Figure와 데이터프레임은 hash가 안 되므로 id(obj) -> (약한 참조, 크기)로 저장하고 객체가 사라지면 지운다.
+_payload_sizes = {}
+_payload_lock = threading.Lock()
+
+
+# 현재 프로세스의 RSS (바이트, /proc가 없는 환경에서는 None)
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# 결과에 들어 있는 행 수 (데이터프레임, 배열, 또는 이들의 튜플/리스트)
+def count_rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        counts = [count_rows(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+# 화면 요소가 브라우저로 보내는 크기 (바이트)
+# Figure는 Plotly JSON, 표(Styler 포함)는 Streamlit처럼 Arrow로 직렬화한 크기, HTML은 문자열 길이
+def payload_bytes(obj):
+    if isinstance(obj, str):
+        return len(obj.encode('utf-8'))
+    with _payload_lock:
+        entry = _payload_sizes.get(id(obj))
+    if entry is not None and entry[0]() is obj:
+        return entry[1]
+
+    size = _payload_bytes(obj)
+    try:
+        ref = weakref.ref(obj, lambda _, key=id(obj): _payload_sizes.pop(key, None))
+    except TypeError:
+        return size
+    with _payload_lock:
+        _payload_sizes[id(obj)] = (ref, size)
+    return size
+
+
+def _payload_bytes(obj):
+    if hasattr(obj, 'to_plotly_json'):
+        return len(pio.to_json(obj, validate=False).encode('utf-8'))
+    if isinstance(getattr(obj, 'data', None), pd.DataFrame):
+        obj = obj.data
+    if isinstance(obj, pd.DataFrame):
+        try:
+            table = pa.Table.from_pandas(obj)
+        except (pa.ArrowException, TypeError, ValueError):
+            return None
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().size
+    return None
+
+
+class RunProfile:
+    # rerun 한 번의 구간 기록
+    # 구간은 시작한 순서대로 spans에 쌓이고, depth는 바깥 구간 안에 몇 단계 들어가 있는지를 나타낸다.
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.seconds = None
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._stack = []
+        self._section = None
+
+    def _begin(self, name, kind, detail=None):
+        record = {'name': name, 'kind': kind, 'detail': detail, 'depth': len(self._stack),
+                  'start': time.perf_counter() - self._origin, 'seconds': None, 'rows': None,
+                  'memory_delta': None, 'bytes': None, 'cache_hit': None, '_rss': rss_bytes()}
+        self.spans.append(record)
+        self._stack.append(record)
+        return record
+
+    def _end(self, record):
+        record['seconds'] = time.perf_counter() - self._origin - record['start']
+        rss = rss_bytes()
+        if rss is not None and record['_rss'] is not None:
+            record['memory_delta'] = rss - record['_rss']
+        if record in self._stack:
+            self._stack.remove(record)
+
+    @contextmanager
+    def span(self, name, kind, detail=None):
+        record = self._begin(name, kind, detail)
+        try:
+            yield record
+        finally:
+            self._end(record)
+
+    # 스크립트 중간에서 새 섹션 시작 (열려 있던 섹션은 닫음)
+    def section(self, name):
+        self.end_section()
+        self._section = self._begin(name, 'section')
+
+    def end_section(self):
+        if self._section is not None:
+            self._end(self._section)
+            self._section = None
+
+    def finish(self):
+        self.end_section()
+        for record in list(self._stack):
+            self._end(record)
+        self.seconds = time.perf_counter() - self._origin
+
+    def cache_counts(self):
+        hits = sum(1 for record in self.spans if record['cache_hit'] is True)
+        misses = sum(1 for record in self.spans if record['cache_hit'] is False)
+        return hits, misses
+
+    # 첫 화면 요소를 다 보낸 시각 (rerun 시작 기준 초, 화면 요소가 없으면 None)
+    def first_render_seconds(self):
+        for record in self.spans:
+            if record['kind'] == 'render' and record['seconds'] is not None:
+                return record['start'] + record['seconds']
+        return None
+
+    def payload_total(self):
+        return sum(record['bytes'] or 0 for record in self.spans)
+
+    def to_frame(self):
+        rows = []
+        for record in self.spans:
+            rows.append([
+                record['name'], record['kind'], record['detail'], record['depth'],
+                round(record['start'] * 1000, 1),
+                round(record['seconds'] * 1000, 1) if record['seconds'] is not None else np.nan,
+                record['rows'] if record['rows'] is not None else np.nan,
+                round(record['memory_delta'] / 2 ** 20, 1) if record['memory_delta'] is not None else np.nan,
+                round(record['bytes'] / 1024, 1) if record['bytes'] is not None else np.nan,
+                {True: '적중', False: '다시 계산'}.get(record['cache_hit'], ''),
+            ])
+        frame = pd.DataFrame(rows, columns=SPAN_COLUMNS)
+        frame['행 수'] = frame['행 수'].astype('Int64')
+        return frame
+
+    # 캐시별 적중/다시 계산 횟수
+    def cache_frame(self):
+        counts = {}
+        for record in self.spans:
+            if record['cache_hit'] is None:
+                continue
+            hits, misses, seconds = counts.get(record['detail'], (0, 0, 0.0))
+            if record['cache_hit']:
+                hits += 1
+            else:
+                misses += 1
+                seconds += record['seconds'] or 0.0
+            counts[record['detail']] = (hits, misses, seconds)
+        rows = [[name, hits, misses, round(seconds * 1000, 1)] for name, (hits, misses, seconds) in counts.items()]
+        return pd.DataFrame(rows, columns=CACHE_COLUMNS)
+
+    def log_records(self):
+        started_at = datetime.fromtimestamp(self.started_at).isoformat(timespec='milliseconds')
+        for record in self.spans:
+            yield {
+                'run': self.run_id, 'started_at': started_at, 'span': record['name'], 'kind': record['kind'],
+                'detail': record['detail'], 'depth': record['depth'],
+                'start_ms': round(record['start'] * 1000, 3),
+                'duration_ms': round(record['seconds'] * 1000, 3) if record['seconds'] is not None else None,
+                'rows': record['rows'], 'memory_delta_bytes': record['memory_delta'],
+                'payload_bytes': record['bytes'], 'cache_hit': record['cache_hit'],
+            }
+
+
+# ----------------------------
+# rerun 시작/종료와 기록 함수
+# ----------------------------
+
+# 현재 스레드의 rerun 측정 시작 (enabled가 False이면 이전 기록만 지우고 측정하지 않음)
+def start_run(enabled=True):
+    _local.profile = RunProfile(next(_run_ids)) if enabled else None
+    return _local.profile
+
+
+def current_run():
+    return getattr(_local, 'profile', None)
+
+
+# 현재 스레드의 rerun 측정을 끝내고 최근 기록에 추가 (INFO 로그가 켜져 있으면 구간마다 JSON 한 줄씩 남김)
+def finish_run():
+    profile = current_run()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.finish()
+    with _history_lock:
+        _history.append(profile)
+    if logger.isEnabledFor(logging.INFO):
+        for record in profile.log_records():
+            logger.info(json.dumps(record, ensure_ascii=False))
+    return profile
+
+
+def recent_runs():
+    with _history_lock:
+        return list(_history)
+
+
+def section(name):
+    profile = current_run()
+    if profile is not None:
+        profile.section(name)
+
+
+# 화면 요소 출력 draw(obj, ...)를 구간으로 기록하고 전송 크기를 남김 (측정 중이 아니면 그대로 출력만)
+# 전송 크기는 구간이 끝난 뒤에 계산하므로 직렬화 시간은 구간 소요 시간에 들어가지 않는다.
+def render(name, draw, obj, *args, **kwargs):
+    profile = current_run()
+    if profile is None:
+        return draw(obj, *args, **kwargs)
+    with profile.span(name, 'render', draw.__name__) as record:
+        result = draw(obj, *args, **kwargs)
+    record['bytes'] = payload_bytes(obj)
+    record['rows'] = count_rows(getattr(obj, 'data', obj))
+    return result
+
+
+# 캐시된 함수 호출을 구간으로 기록 (cache.memoize에서 호출)
+def _cache_call(cache_name, func_name, call):
+    profile = current_run()
+    if profile is None:
+        return call()[0]
+    with profile.span(func_name, 'cache', cache_name) as record:
+        value, hit = call()
+        record['cache_hit'] = hit
+        record['rows'] = count_rows(value)
+    return value
+
+
+set_call_hook(_cache_call)
+
+
+# ----------------------------
+# 내보내기
+# ----------------------------
+
+def runs_frame(runs):
+    rows = []
+    for profile in runs:
+        hits, misses = profile.cache_counts()
+        rows.append([profile.run_id, datetime.fromtimestamp(profile.started_at).strftime('%H:%M:%S'),
+                     round((profile.seconds or 0) * 1000, 1), hits, misses, round(profile.payload_total() / 1024, 1)])
+    return pd.DataFrame(rows, columns=RUN_COLUMNS)
+
+
+# JSON Lines 형식의 구조화된 로그
+def log_lines(runs):
+    return '\n'.join(json.dumps(record, ensure_ascii=False) for profile in runs for record in profile.log_records()) + '\n'
+
+
+# Chrome trace 형식 (chrome://tracing 또는 https://ui.perfetto.dev 에서 열기)
+# rerun마다 별도의 트랙(tid)으로 표시하고, 시각은 가장 먼저 시작한 rerun 기준 마이크로초
+def chrome_trace(runs):
+    events = []
+    pid = os.getpid()
+    origin = min((profile.started_at for profile in runs), default=0.0)
+    for profile in runs:
+        offset = (profile.started_at - origin) * 1e6
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': profile.run_id,
+                       'args': {'name': f'rerun {profile.run_id}'}})
+        for record in profile.spans:
+            args = {key: record[key] for key in ('detail', 'rows', 'memory_delta', 'bytes', 'cache_hit')
+                    if record[key] is not None}
+            events.append({'name': record['name'], 'cat': record['kind'], 'ph': 'X', 'pid': pid, 'tid': profile.run_id,
+                           'ts': round(offset + record['start'] * 1e6, 1),
+                           'dur': round((record['seconds'] or 0.0) * 1e6, 1), 'args': args})
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, ensure_ascii=False)
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# ----------------------------
+# 법정구역 경계에 대한 격자 공간 인덱스 (point-in-polygon 조인)
+# ----------------------------
+
+# 경계 전체를 resolution(도) 크기의 격자로 나누고, 각 칸의 중심이 속한 지역 번호를 미리 채워 둔다.
+# 경계선이 지나가지 않는 칸 안의 점은 칸의 지역 번호를 그대로 쓰면 되므로 배열 조회 한 번으로 끝나고,
+# 경계선이 지나가는 칸의 점만 그 칸을 지나는 지역들에 대해 ray casting으로 정확히 판정한다.
+# 이때도 점과 같은 가로 띠(격자 한 줄)에 걸친 변만 검사하므로 비교 횟수가 적다.
+
+CACHE_DIR = os.path.join('.cache', 'spatial')
+
+# 지역이 없는 칸/점의 번호
+OUTSIDE = -1
+
+
+def _feature_edges(features):
+    x1, y1, x2, y2, feature_ids = [], [], [], [], []
+    for feature_id, feature in enumerate(features):
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        for polygon in polygons:
+            for ring in polygon:
+                ring = np.asarray(ring, dtype=float)[:, :2]
+                if len(ring) < 2:
+                    continue
+                if not np.array_equal(ring[0], ring[-1]):
+                    ring = np.vstack([ring, ring[:1]])
+                x1.append(ring[:-1, 0])
+                y1.append(ring[:-1, 1])
+                x2.append(ring[1:, 0])
+                y2.append(ring[1:, 1])
+                feature_ids.append(np.full(len(ring) - 1, feature_id))
+    return [np.concatenate(values) for values in (x1, y1, x2, y2)] + [np.concatenate(feature_ids).astype(np.int32)]
+
+
+# 여러 구간 [starts[i], ends[i]) 를 하나의 배열로 펼침 -> (구간 번호, 값)
+def _expand_ranges(starts, ends):
+    lengths = np.maximum(ends - starts, 0)
+    ids = np.repeat(np.arange(len(starts)), lengths)
+    values = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+    return ids, values
+
+
+class SpatialIndex:
+    def __init__(self, arrays):
+        for name, value in arrays.items():
+            setattr(self, name, value)
+        self.x0, self.y0, self.resolution = (float(value) for value in self.grid)
+        self.ny, self.nx = self.labels.shape
+
+    @classmethod
+    def build(cls, features, resolution=0.0025):
+        all_edges = _feature_edges(features)
+        n_features = len(features)
+        x1, y1, x2, y2, edge_features = all_edges
+        x0 = min(x1.min(), x2.min()) - resolution
+        y0 = min(y1.min(), y2.min()) - resolution
+        nx = int(np.ceil((max(x1.max(), x2.max()) - x0) / resolution)) + 2
+        ny = int(np.ceil((max(y1.max(), y2.max()) - y0) / resolution)) + 2
+
+        # 수평인 변은 ray casting에 영향이 없으므로 제외하고, 변을 가로 띠(격자 행) 기준으로 정렬
+        sloped = y1 != y2
+        x1, y1, x2, y2, edge_features = (values[sloped] for values in all_edges)
+        sloped_edges = np.column_stack([x1, y1, x2, y2])
+        row_first = np.floor((np.minimum(y1, y2) - y0) / resolution).astype(np.int64)
+        row_last = np.floor((np.maximum(y1, y2) - y0) / resolution).astype(np.int64)
+        edge_ids, rows = _expand_ranges(row_first, row_last + 1)
+        band_keys = rows * n_features + edge_features[edge_ids]
+        order = np.argsort(band_keys, kind='stable')
+        band_keys, band_edges = band_keys[order], edge_ids[order]
+
+        # 각 행의 중심선과 변의 교점으로 칸 중심이 속한 지역을 채움 (even-odd 규칙)
+        center_y = y0 + (rows + 0.5) * resolution
+        ey1, ey2 = y1[edge_ids], y2[edge_ids]
+        crosses = (ey1 > center_y) != (ey2 > center_y)
+        crossing_edges, crossing_rows = edge_ids[crosses], rows[crosses]
+        t = (center_y[crosses] - y1[crossing_edges]) / (y2[crossing_edges] - y1[crossing_edges])
+        crossing_x = x1[crossing_edges] + t * (x2[crossing_edges] - x1[crossing_edges])
+        crossing_features = edge_features[crossing_edges]
+        order = np.lexsort((crossing_x, crossing_rows, crossing_features))
+        crossing_x, crossing_rows, crossing_features = crossing_x[order], crossing_rows[order], crossing_features[order]
+
+        diff = np.zeros((ny, nx + 1), dtype=np.int32)
+        span_starts = np.arange(0, len(crossing_x) - 1, 2)
+        columns_start = np.clip(np.ceil((crossing_x[span_starts] - x0) / resolution - 0.5), 0, nx).astype(np.int64)
+        columns_end = np.clip(np.ceil((crossing_x[span_starts + 1] - x0) / resolution - 0.5), 0, nx).astype(np.int64)
+        span_rows, span_features = crossing_rows[span_starts], crossing_features[span_starts]
+        np.add.at(diff, (span_rows, columns_start), span_features + 1)
+        np.add.at(diff, (span_rows, columns_end), -(span_features + 1))
+        labels = (np.cumsum(diff, axis=1)[:, :nx] - 1).astype(np.int32)
+
+        # 경계선이 지나가는 칸과 그 칸을 지나는 지역 목록 (수평인 변도 포함)
+        x1, y1, x2, y2, edge_features = all_edges
+        column_first = np.floor((np.minimum(x1, x2) - x0) / resolution).astype(np.int64)
+        column_last = np.floor((np.maximum(x1, x2) - x0) / resolution).astype(np.int64)
+        row_first = np.floor((np.minimum(y1, y2) - y0) / resolution).astype(np.int64)
+        row_last = np.floor((np.maximum(y1, y2) - y0) / resolution).astype(np.int64)
+        widths = column_last - column_first + 1
+        edge_ids, offsets = _expand_ranges(np.zeros(len(x1), dtype=np.int64), widths * (row_last - row_first + 1))
+        columns = column_first[edge_ids] + offsets % widths[edge_ids]
+        rows = row_first[edge_ids] + offsets // widths[edge_ids]
+
+        # 변의 외접 사각형 안의 칸 중 실제로 변이 지나가는 칸만 남김 (칸의 네 꼭짓점이 변의 양쪽에 있는지 확인)
+        dx, dy = x2[edge_ids] - x1[edge_ids], y2[edge_ids] - y1[edge_ids]
+        sides = []
+        for corner_column, corner_row in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            corner_x = x0 + (columns + corner_column) * resolution
+            corner_y = y0 + (rows + corner_row) * resolution
+            sides.append(dx * (corner_y - y1[edge_ids]) - dy * (corner_x - x1[edge_ids]))
+        sides = np.array(sides)
+        touched = (sides.min(axis=0) <= 0) & (sides.max(axis=0) >= 0)
+
+        cell_keys = np.unique((rows[touched] * nx + columns[touched]) * n_features + edge_features[edge_ids[touched]])
+
+        # 경계 칸을 완전히 덮는 지역(경계 데이터에 겹치는 부분이 있을 때 생김)도 후보에 추가
+        # 위에서 칸 중심을 채울 때 쓴 구간(같은 행에서 지역 안쪽인 열 범위)에 속한 경계 칸이 그 지역에 덮인 칸이다.
+        cells = np.unique(cell_keys // n_features)
+        span_ids, cell_slots = _expand_ranges(np.searchsorted(cells, span_rows * nx + columns_start),
+                                              np.searchsorted(cells, span_rows * nx + columns_end))
+        cell_keys = np.union1d(cell_keys, cells[cell_slots] * n_features + span_features[span_ids])
+
+        boundary_cells, cell_starts = np.unique(cell_keys // n_features, return_index=True)
+        labels.flat[boundary_cells] = -2
+
+        return cls({
+            'grid': np.array([x0, y0, resolution]),
+            'labels': labels,
+            'boundary_cells': boundary_cells,
+            'boundary_offsets': np.r_[cell_starts, len(cell_keys)],
+            'boundary_features': (cell_keys % n_features).astype(np.int32),
+            'band_keys': band_keys,
+            'band_edges': band_edges,
+            'edges': sloped_edges,
+            'n_features': np.array(n_features),
+        })
+
+    # 점(경도, 위도) 배열이 속한 지역 번호 배열 (어느 지역에도 속하지 않으면 OUTSIDE)
+    def query(self, lon, lat):
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        result = np.full(len(lon), OUTSIDE, dtype=np.int32)
+
+        columns = np.floor((lon - self.x0) / self.resolution)
+        rows = np.floor((lat - self.y0) / self.resolution)
+        inside_grid = (columns >= 0) & (columns < self.nx) & (rows >= 0) & (rows < self.ny)
+        points = np.flatnonzero(inside_grid)
+        columns, rows = columns[points].astype(np.int64), rows[points].astype(np.int64)
+        cell_labels = self.labels[rows, columns]
+        result[points] = np.where(cell_labels >= 0, cell_labels, OUTSIDE)
+
+        # 경계 칸의 점만 정밀 판정
+        ambiguous = cell_labels == -2
+        points, rows, cells = points[ambiguous], rows[ambiguous], (rows * self.nx + columns)[ambiguous]
+        cell_index = np.searchsorted(self.boundary_cells, cells)
+        pair_points, candidate_slots = _expand_ranges(self.boundary_offsets[cell_index], self.boundary_offsets[cell_index + 1])
+        candidates = self.boundary_features[candidate_slots]
+
+        # (점, 후보 지역) 쌍마다 같은 가로 띠에 있는 그 지역의 변들
+        keys = rows[pair_points] * int(self.n_features) + candidates
+        pair_ids, edge_slots = _expand_ranges(np.searchsorted(self.band_keys, keys, side='left'),
+                                              np.searchsorted(self.band_keys, keys, side='right'))
+        x1, y1, x2, y2 = self.edges[self.band_edges[edge_slots]].T
+        px, py = lon[points[pair_points[pair_ids]]], lat[points[pair_points[pair_ids]]]
+        spans = (y1 > py) != (y2 > py)
+        crossing_x = x1 + (py - y1) / np.where(spans, y2 - y1, 1) * (x2 - x1)
+        crossings = np.bincount(pair_ids[spans & (crossing_x > px)], minlength=len(pair_points))
+
+        inside = crossings % 2 == 1
+        result[points] = OUTSIDE
+        result[points[pair_points[inside]]] = candidates[inside]
+        return result
+
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in (
+            'grid', 'labels', 'boundary_cells', 'boundary_offsets', 'boundary_features',
+            'band_keys', 'band_edges', 'edges', 'n_features')}
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+
+# GeoJSON 파일로 공간 인덱스를 만들거나 .cache/spatial 에 저장된 인덱스를 불러옴
+# 지역 코드 목록(id_property 값)을 함께 반환하며, 원본 내용이 바뀌면 인덱스를 새로 만든다.
+def load_spatial_index(geojson_path, id_property, resolution=0.0025):
+    with open(geojson_path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha1(source + str(resolution).encode()).hexdigest()[:16]
+    features = json.loads(source.decode('utf-8'))['features']
+    codes = np.array([feature['properties'][id_property] for feature in features])
+
+    path = os.path.join(CACHE_DIR, f'{digest}.npz')
+    if os.path.exists(path):
+        return SpatialIndex.load(path), codes
+
+    index = SpatialIndex.build(features, resolution)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    index.save(path)
+    return index, codes
+
+
+# GeoJSON의 지역 코드(id_property) -> 지역 이름(name_property)
+def load_region_names(geojson_path, id_property, name_property):
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+    return {feature['properties'][id_property]: feature['properties'][name_property] for feature in features}
@@ -0,0 +1,357 @@
+import argparse
+import datetime
+import hashlib
+import html
+import json
+import os
+import runpy
+import shutil
+import sys
+
+from plotly.offline import get_plotlyjs
+from streamlit import config
+from streamlit.logger import set_log_level
+
+import prebuilt
+from parallel_loader import map_in_parallel
+
+# ----------------------------
+# 대시보드 정적 번들 만들기
+# ----------------------------
+
+# 입력 파일이 모두 정적이고 화면에서 바뀌는 값은 시도 선택(17개)과 대상사고 구분/항목뿐이므로,
+# app.py를 Streamlit 서버 없이 실행(bare mode)해 앱의 함수들을 얻은 다음 전국 화면, 시도별 화면,
+# 대상사고 구분별 화면을 미리 그려 정적 HTML/JSON 번들로 저장한다.
+# 화면은 워커 프로세스에서 나눠 그리며(parallel_loader.map_in_parallel), 각 워커는 app.py를 한 번만 실행한다.
+#
+#   python static_export.py --output dist
+#   python -m http.server --directory dist
+#
+# 번들 구성 (파일 이름의 해시는 내용의 해시이므로 내용이 같으면 같은 파일, 바뀌면 새 이름이 되어 오래 캐시해도 된다)
+# - index.html, stats.html, <시도명>.html: 화면 (표는 HTML로 들어 있고 그래프는 data/의 JSON을 불러와 그림)
+# - data/<이름>.<해시>.json: Plotly Figure. Choropleth의 GeoJSON은 빼내어 assets/geo에 한 번만 저장하고 경로만 남긴다.
+# - assets/geo/geo.<해시>.geojson: 여러 Figure가 함께 쓰는 GeoJSON (같은 시도, 같은 경계 조합이면 하나의 파일)
+# - assets/heat/<해시>/: 히트맵 타일 (static/heat의 타일을 복사), maps/heatmap.<해시>.html: 히트맵 페이지
+# - manifest.json: Figure를 만든 함수와 인자, 파일, 입력 파일 정보 (Streamlit 앱이 prebuilt.py로 재사용)
+#
+# 대상사고 구분별 지도와 추이는 전체 연도 범위만 미리 그린다 (연도 범위를 바꾸면 앱에서 계산).
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(REPO_DIR, 'app.py')
+
+HASH_LENGTH = 12
+
+# 그래프 JSON을 불러와 GeoJSON 경로를 실제 GeoJSON으로 바꾼 뒤 그리는 스크립트 (같은 GeoJSON은 한 번만 받음)
+DASHBOARD_JS = """(function () {
+  var geojsonCache = {};
+  function fetchJson(url) {
+    return fetch(url).then(function (response) { return response.json(); });
+  }
+  window.drawFigure = function (div, url) {
+    return fetchJson(url).then(function (figure) {
+      return Promise.all(figure.data.map(function (trace) {
+        if (typeof trace.geojson !== 'string') return null;
+        geojsonCache[trace.geojson] = geojsonCache[trace.geojson] || fetchJson(trace.geojson);
+        return geojsonCache[trace.geojson].then(function (geojson) { trace.geojson = geojson; });
+      })).then(function () {
+        return Plotly.react(div, figure.data, figure.layout, {responsive: true});
+      });
+    });
+  };
+  document.querySelectorAll('[data-figure]').forEach(function (div) {
+    window.drawFigure(div, div.dataset.figure);
+  });
+})();
+"""
+
+# 대상사고 구분과 항목을 고르면 해당 지도와 추이 그래프를 불러오는 스크립트 (stats.html)
+STATS_JS = """(function () {
+  var figures = JSON.parse(document.getElementById('stats-figures').textContent);
+  var category = document.getElementById('stats-category');
+  var measure = document.getElementById('stats-measure');
+  function update() {
+    var files = figures[category.value][measure.value];
+    window.drawFigure(document.getElementById('stats-map'), files[0]);
+    window.drawFigure(document.getElementById('stats-trend'), files[1]);
+  }
+  category.addEventListener('change', update);
+  measure.addEventListener('change', update);
+  update();
+})();
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>body {{ font-family: sans-serif; max-width: 1100px; margin: 0 auto; padding: 1em; }} nav a {{ margin-right: 0.6em; }}</style>
+</head>
+<body>
+<nav>{nav}</nav>
+{body}
+<script src="{dashboard_js}"></script>
+{scripts}
+</body>
+</html>
+"""
+
+# 워커 프로세스마다 한 번만 실행한 app.py의 전역 변수
+_app = None
+
+
+def load_app():
+    global _app
+    if _app is None:
+        # bare mode 실행 경고 숨김 (설정 파일을 읽을 때 로거 수준이 다시 지정되므로 설정을 먼저 읽은 뒤 바꿈),
+        # 이전 번들의 Figure를 다시 쓰지 않고 새로 계산
+        config.get_config_options()
+        set_log_level('error')
+        prebuilt.set_enabled(False)
+        _app = runpy.run_path(APP_PATH, run_name='__main__')
+    return _app
+
+
+# ----------------------------
+# 내용 해시 이름으로 파일 쓰기
+# ----------------------------
+
+# data를 folder/name.<해시><suffix>로 저장하고 번들 기준 상대 경로를 반환 (같은 내용이면 이미 있는 파일을 사용)
+# 여러 워커가 같은 파일을 동시에 쓸 수 있으므로 임시 파일에 쓴 뒤 이름을 바꾼다.
+def write_hashed(out_dir, folder, name, suffix, data):
+    relative_path = f'{folder}/{name}.{hashlib.sha1(data).hexdigest()[:HASH_LENGTH]}{suffix}'
+    path = os.path.join(out_dir, relative_path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return relative_path
+
+
+def _json_bytes(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# Figure를 JSON으로 저장 (trace의 GeoJSON은 assets/geo의 공유 파일로 빼내고 경로로 바꿈)
+def write_figure(out_dir, name, fig):
+    data = json.loads(fig.to_json())
+    for trace in data['data']:
+        if isinstance(trace.get('geojson'), dict):
+            trace['geojson'] = write_hashed(out_dir, 'assets/geo', 'geo', '.geojson', _json_bytes(trace['geojson']))
+    return write_hashed(out_dir, 'data', name, '.json', _json_bytes(data))
+
+
+# 히트맵 타일을 assets/heat로 복사하고 그 타일을 쓰는 히트맵 페이지를 저장
+def write_heatmap(out_dir, g, sido=None, zoom_start=7):
+    tile_dir = g['load_heat_tiles'](g['HOTSPOT_PATH'], g['GEOJSON_PATH'], g['SIDO_GEOJSON_PATH'], sido)
+    target = os.path.join(out_dir, 'assets', 'heat', os.path.basename(tile_dir))
+    if not os.path.exists(target):
+        tmp_target = f'{target}.{os.getpid()}.tmp'
+        shutil.copytree(tile_dir, tmp_target)
+        try:
+            os.rename(tmp_target, target)
+        except OSError:  # 다른 워커가 먼저 복사함
+            shutil.rmtree(tmp_target)
+    page = g['heatmap_html'](g['HOTSPOT_PATH'], g['GEOJSON_PATH'], g['SIDO_GEOJSON_PATH'], sido, zoom_start,
+                              '../assets/heat')
+    return write_hashed(out_dir, 'maps', 'heatmap', '.html', page.encode('utf-8'))
+
+
+# ----------------------------
+# 화면 그리기
+# ----------------------------
+
+# 한 화면(task)을 그리는 동안 저장한 Figure를 manifest 항목으로 기록
+class BundleWriter:
+    def __init__(self, out_dir, assets):
+        self.out_dir = out_dir
+        self.assets = assets
+        self.figures = {}
+        self.pages = []
+
+    # app.py의 Figure 함수를 호출해 저장하고 파일 경로 목록을 반환 (Figure 튜플을 반환하는 함수는 여러 개)
+    def figure(self, func, *args):
+        result = func(*args)
+        figures = result if isinstance(result, tuple) else (result,)
+        name = func.__name__
+        files = [write_figure(self.out_dir, name, fig) for fig in figures]
+        self.figures[prebuilt.figure_key(func, args)] = {
+            'files': files,
+            'tuple': isinstance(result, tuple),
+            'inputs': prebuilt.fingerprint(func, args),
+        }
+        return files
+
+    # scripts: 화면 전용 스크립트 경로 (window.drawFigure를 쓰므로 dashboard.js 다음에 불러옴)
+    def page(self, file_name, title, nav, body, scripts=()):
+        scripts = '\n'.join(f'<script src="{html.escape(path)}"></script>' for path in scripts)
+        content = PAGE_TEMPLATE.format(title=html.escape(title), nav=nav, body='\n'.join(body), scripts=scripts,
+                                       **self.assets)
+        with open(os.path.join(self.out_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.pages.append(file_name)
+
+
+def _figure_div(path, height=None):
+    style = f' style="height:{height}px"' if height else ''
+    return f'<div data-figure="{html.escape(path)}"{style}></div>'
+
+
+def _heatmap_iframe(path):
+    return f'<iframe src="{html.escape(path)}" width="100%" height="500" style="border:none"></iframe>'
+
+
+def _table(g, df):
+    return g['style_table'](df).to_html()
+
+
+def _nav(g):
+    links = [('index.html', '전국'), ('stats.html', '대상사고 구분별')]
+    links += [(f'{sido}.html', sido) for sido in g['hotspot_ranking'].groups]
+    return ''.join(f'<a href="{html.escape(href)}">{html.escape(label)}</a>' for href, label in links)
+
+
+# 전국 화면: 전국 지도, Top20 표, 히트맵, Q2 요일/시간대, Q3 이벤트 그래프와 평소 대비 표
+def render_national(writer, g):
+    hotspot, geojson, sido_geojson = g['HOTSPOT_PATH'], g['GEOJSON_PATH'], g['SIDO_GEOJSON_PATH']
+    daily = g['daily_store'].current().files
+    body = ['<h1>초보운전, 언제가 가장 안전할까?</h1>',
+            '<h2>Q1. 전국에서 교통사고가 많이 발생하는 지역은 어디일까?</h2>',
+            '<h3>1. 전국 교통사고 다발 지역 시각화 (2012-2021)</h3>',
+            _figure_div(writer.figure(g['national_choropleth'], hotspot, geojson, sido_geojson)[0], 500),
+            '<h4>사고지역위치명으로 합산한 사고 다발 지역 (전국 Top20)</h4>',
+            _table(g, g['hotspot_ranking'].top(20)[['사고지역위치명', '사고건수']]),
+            '<h4>시군구 기준으로 합산한 사고 다발 지역 (전국 Top20)</h4>',
+            _table(g, g['district_ranking'].top(20)),
+            '<h4>전국 교통사고 다발 지역 히트맵</h4>',
+            _heatmap_iframe(write_heatmap(writer.out_dir, g)),
+            '<h2>Q2. 운전하기에 적절한 요일, 시간대는 언제일까?</h2>']
+    body += [_figure_div(path) for path in writer.figure(g['weekday_hour_figures'], g['weekday_hour_paths'])]
+    body.append('<h2>Q3. 특정 기간의 교통사고 추이는 어떻게 변화했을까?</h2>')
+    body.append(_figure_div(writer.figure(g['children_day_figure'], daily)[0]))
+    for holiday_name in g['holiday_dates_by_name']:
+        body.append(_figure_div(writer.figure(g['holiday_figure'], daily, holiday_name)[0]))
+    body.append(_figure_div(writer.figure(g['world_cup_figure'], daily)[0]))
+    body.append(_figure_div(writer.figure(g['world_cup_monthly_figure'], daily)[0]))
+    body.append('<h4>평소 대비 이벤트 기간의 일평균 사고건수 (앞뒤 1~2주의 같은 요일 기준)</h4>')
+    body.append(_table(g, g['event_baseline_table'](daily)))
+    writer.page('index.html', '전국 교통사고 다발 지역', _nav(g), body)
+
+
+# 시도 화면: 시도 지도(다발 지역 폴리곤 포함), Top10 표, 히트맵
+def render_sido(writer, g, sido):
+    hotspot, geojson, sido_geojson = g['HOTSPOT_PATH'], g['GEOJSON_PATH'], g['SIDO_GEOJSON_PATH']
+    body = [f'<h2>{html.escape(sido)}의 교통사고 다발 지역 시각화 (2012-2021)</h2>',
+            _figure_div(writer.figure(g['sido_choropleth'], hotspot, geojson, sido_geojson, sido)[0], 500),
+            f'<h4>{html.escape(sido)} 내 사고 다발 지역 (Top10)</h4>',
+            _table(g, g['hotspot_ranking'].group_top(sido, 10)[['사고지역위치명', '사고건수']]),
+            f'<h4>{html.escape(sido)} 교통사고 다발 지역 히트맵</h4>',
+            _heatmap_iframe(write_heatmap(writer.out_dir, g, sido, zoom_start=9))]
+    writer.page(f'{sido}.html', sido, _nav(g), body)
+
+
+# 대상사고 구분 하나의 모든 항목에 대한 시도 지도와 추이 그래프 (전체 연도 범위) -> {항목: [지도, 추이]}
+def render_stats_category(writer, g, category):
+    cube = g['load_stats_cube'](g['STATS_PATH'])
+    years = (cube.years[0], cube.years[-1])
+    return {measure: [writer.figure(g['stats_choropleth'], g['STATS_PATH'], g['SIDO_GEOJSON_PATH'], years, category, measure)[0],
+                      writer.figure(g['stats_trend_figure'], g['STATS_PATH'], years, (category,), measure)[0]]
+            for measure in cube.measure_options}
+
+
+def render_stats_page(writer, g, figures):
+    cube = g['load_stats_cube'](g['STATS_PATH'])
+
+    def options(values):
+        return ''.join(f'<option>{html.escape(value)}</option>' for value in values)
+
+    body = [f'<h2>대상사고 구분별 시도 교통사고 ({cube.years[0]}-{cube.years[-1]})</h2>',
+            f'<select id="stats-category">{options(cube.categories)}</select>',
+            f'<select id="stats-measure">{options(cube.measure_options)}</select>',
+            '<div id="stats-map" style="height:500px"></div>',
+            '<div id="stats-trend"></div>',
+            f'<script type="application/json" id="stats-figures">{json.dumps(figures, ensure_ascii=False)}</script>']
+    writer.page('stats.html', '대상사고 구분별 시도 교통사고', _nav(g), body, [writer.assets['stats_js']])
+
+
+# 워커 프로세스에서 실행: task = ('national', None) | ('sido', 시도명) | ('stats', 대상사고 구분)
+def render_view(task, out_dir, assets):
+    g = load_app()
+    writer = BundleWriter(out_dir, assets)
+    kind, name = task
+    result = None
+    if kind == 'national':
+        render_national(writer, g)
+    elif kind == 'sido':
+        render_sido(writer, g, name)
+    else:
+        result = render_stats_category(writer, g, name)
+    return writer.pages, writer.figures, result
+
+
+def build(out_dir, max_workers=None):
+    # 이전 번들은 지우고 새로 만듦 (manifest.json이 있는 디렉터리만)
+    if os.path.exists(os.path.join(out_dir, prebuilt.MANIFEST_NAME)):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 현재 프로세스에서 앱을 먼저 실행해 디스크 캐시(.cache)를 채워 두면 워커는 캐시를 읽기만 한다.
+    g = load_app()
+    assets = {
+        'plotly_js': write_hashed(out_dir, 'assets', 'plotly.min', '.js', get_plotlyjs().encode('utf-8')),
+        'dashboard_js': write_hashed(out_dir, 'assets', 'dashboard', '.js', DASHBOARD_JS.encode('utf-8')),
+        'stats_js': write_hashed(out_dir, 'assets', 'stats', '.js', STATS_JS.encode('utf-8')),
+    }
+
+    categories = g['load_stats_cube'](g['STATS_PATH']).categories
+    tasks = [('national', None)] + [('sido', sido) for sido in g['hotspot_ranking'].groups] + \
+            [('stats', category) for category in categories]
+    outputs = map_in_parallel(render_view, tasks, out_dir, assets, max_workers=max_workers)
+
+    pages, figures, stats_figures = [], {}, {}
+    for (kind, name), (task_pages, task_figures, result) in zip(tasks, outputs):
+        pages.extend(task_pages)
+        figures.update(task_figures)
+        if kind == 'stats':
+            stats_figures[name] = result
+
+    writer = BundleWriter(out_dir, assets)
+    render_stats_page(writer, g, stats_figures)
+    pages.extend(writer.pages)
+
+    # manifest는 마지막에 써서, 앱이 만들다 만 번들을 사용하지 않게 함
+    manifest = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'pages': pages,
+        'assets': assets,
+        'figures': figures,
+    }
+    tmp_path = os.path.join(out_dir, prebuilt.MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(out_dir, prebuilt.MANIFEST_NAME))
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='대시보드 정적 번들 만들기')
+    parser.add_argument('--output', default=prebuilt.BUNDLE_DIR,
+                        help=f'번들 디렉터리 (앱이 재사용하는 위치는 {prebuilt.BUNDLE_DIR})')
+    parser.add_argument('--workers', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    args = parser.parse_args(argv)
+
+    # app.py는 저장소 디렉터리 기준 상대 경로로 파일을 읽음
+    out_dir = os.path.abspath(args.output)
+    os.chdir(REPO_DIR)
+    sys.path.insert(0, REPO_DIR)
+
+    manifest = build(out_dir, args.workers)
+    print(f'{out_dir}: 화면 {len(manifest["pages"])}개, Figure {len(manifest["figures"])}개')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+
+from accident_snapshots import DailyAccidentStore
+from accident_store import MEASURE_COLUMNS
+from event_windows import compare_with_baseline, complete_windows, windows_from_dates
+
+# ----------------------------
+# 연도 중간까지만 있는 파일의 증분 반영 확인
+# ----------------------------
+
+PATTERN = os.path.join('daily', '건수(*).csv')
+
+CHUSEOK_DATES = {
+    2019: ['09-12', '09-13', '09-14'],
+    2020: ['09-30', '10-01', '10-02'],
+}
+
+
+def make_windows(cube):
+    return pd.concat([
+        windows_from_dates('어린이날', {year: ['05-05'] for year in cube.years}),
+        windows_from_dates('추석', CHUSEOK_DATES),
+    ], ignore_index=True)
+
+
+# start~end의 하루 한 행 CSV (원본과 같은 euc-kr, 연도는 파일 이름에서 읽음)
+def write_daily_file(year, start, end):
+    dates = pd.date_range(start, end, freq='D')
+    df = pd.DataFrame({'발생월': dates.month, '발생일': dates.day, '시도': '서울', '시군구': '종로구'})
+    for column in MEASURE_COLUMNS:
+        df[column] = 1
+    df['사고건수'] = 10
+    df.to_csv(os.path.join('daily', f'건수({year}).csv'), index=False, encoding='euc-kr')
+
+
+# 1~3월만 있는 2020년 파일이 들어와도 2020년 어린이날, 추석이 0건으로 나오지 않아야 함
+def test_partial_year_update_has_no_empty_windows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('daily')
+    write_daily_file(2019, '2019-01-01', '2019-12-31')
+    store = DailyAccidentStore(make_windows, ['사고건수'], PATTERN)
+    store.refresh()
+
+    write_daily_file(2020, '2020-01-01', '2020-03-31')
+    snapshot = store.refresh()
+    assert snapshot.changed == [os.path.join('daily', '건수(2020).csv')]
+    assert 2020 in snapshot.cube.years
+
+    # 큐브 밖의 2020년 기간은 일수 0으로 계산되지만, 그래프와 비교 표에는 들어가지 않음
+    stats = snapshot.window_stats
+    assert (stats.loc[stats['발생년도'] == 2020, '일수'] == 0).all()
+    complete = complete_windows(stats)
+    assert complete[['이벤트', '발생년도']].values.tolist() == [['어린이날', 2019], ['추석', 2019]]
+    assert complete['사고건수'].tolist() == [10, 30]
+
+    comparison = compare_with_baseline(snapshot.cube, make_windows(snapshot.cube))
+    assert comparison['발생년도'].tolist() == [2019, 2019]
+
+
+# 기간 일부만 큐브에 있는 경우도 합계가 실제보다 작으므로 제외
+def test_window_partly_outside_cube_is_dropped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('daily')
+    write_daily_file(2019, '2019-01-01', '2019-09-13')
+    snapshot = DailyAccidentStore(make_windows, ['사고건수'], PATTERN).refresh()
+
+    chuseok = snapshot.window_stats[snapshot.window_stats['이벤트'] == '추석']
+    assert chuseok['일수'].tolist() == [2, 0]
+    assert complete_windows(snapshot.window_stats)['이벤트'].tolist() == ['어린이날']
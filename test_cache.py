@@ -0,0 +1,32 @@
+import pytest
+
+from cache import LRUCache
+
+# ----------------------------
+# 프로세스 공유 캐시 확인
+# ----------------------------
+
+
+# 계산 중 예외가 나도 키별 잠금이 남지 않고, 같은 키를 다시 계산할 수 있어야 함
+def test_key_lock_removed_when_compute_fails():
+    cache = LRUCache('test')
+
+    def fail():
+        raise ValueError('읽기 실패')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('key', fail)
+
+    assert cache._key_locks == {}
+    assert cache.get_or_compute('key', lambda: 1) == 1
+    assert cache._key_locks == {}
+
+
+# 파일이 바뀔 때마다 새 키로 저장해도 maxsize개까지만 남아야 함
+def test_file_versions_evicted_beyond_maxsize():
+    cache = LRUCache('test', maxsize=2)
+    for mtime in range(5):
+        cache.get_or_compute((('data.csv', mtime, 10),), lambda: mtime)
+
+    assert list(cache._data) == [(('data.csv', 3, 10),), (('data.csv', 4, 10),)]
+    assert cache.evictions == 3
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from accident_cube import DailyAccidentCube
+from accident_store import MEASURE_COLUMNS
+from event_windows import baseline_windows, compare_with_baseline, windows_from_dates, windows_from_ranges
+
+# ----------------------------
+# 이벤트 기간과 평소 기간 비교 확인
+# ----------------------------
+
+
+# start~end의 하루 한 행 데이터 (사고건수는 평소 10건, spikes의 날짜에는 지정한 건수)
+def make_cube(start, end, spikes):
+    dates = pd.date_range(start, end, freq='D')
+    df = pd.DataFrame({'발생년도': dates.year, '발생월': dates.month, '발생일': dates.day,
+                       '시도': '서울', '시군구': '종로구'})
+    for column in MEASURE_COLUMNS:
+        df[column] = 0
+    df['사고건수'] = [spikes.get(date.strftime('%m-%d'), 10) for date in dates]
+    return DailyAccidentCube(df)
+
+
+# 기준 기간은 같은 요일, 같은 길이로 앞뒤 1~weeks주 이동
+def test_baseline_windows_keep_weekday_and_length():
+    windows = windows_from_ranges('연휴', [('05-01', '05-03')], 2020)
+    baseline = baseline_windows(windows, weeks=2)
+
+    assert len(baseline) == 4
+    assert set(baseline['이벤트']) == {'연휴 기준'}
+    assert (baseline['시작일'].dt.dayofweek == windows['시작일'][0].dayofweek).all()
+    assert ((baseline['종료일'] - baseline['시작일']) == pd.Timedelta(days=2)).all()
+
+
+def test_compare_with_baseline_ratio():
+    cube = make_cube('2020-04-01', '2020-06-30', {'05-05': 30})
+    windows = windows_from_dates('어린이날', {2020: ['05-05']})
+
+    comparison = compare_with_baseline(cube, windows)
+
+    row = comparison.iloc[0]
+    assert (row['이벤트'], row['발생년도']) == ('어린이날', 2020)
+    assert row['일평균 사고건수'] == 30
+    assert row['기준 일평균 사고건수'] == 10
+    assert row['기준 대비 비율'] == pytest.approx(3.0)
+
+
+# 큐브 밖으로 나간 기준 날짜는 빼고 남은 날짜로 평균을 냄
+def test_compare_with_baseline_outside_cube():
+    cube = make_cube('2020-05-01', '2020-05-31', {'05-05': 30, '05-12': 20})
+    windows = windows_from_dates('어린이날', {2020: ['05-05']})
+
+    comparison = compare_with_baseline(cube, windows)
+
+    # 기준 날짜 4/21, 4/28은 큐브 밖이고 5/12(20건), 5/19(10건)만 남음
+    assert comparison.iloc[0]['기준 일평균 사고건수'] == 15
+    assert comparison.iloc[0]['기준 대비 비율'] == pytest.approx(2.0)
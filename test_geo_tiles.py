@@ -0,0 +1,21 @@
+from geo_tiles import _ring_area, simplify_geometry
+
+# ----------------------------
+# GeoJSON 도형 단순화 확인
+# ----------------------------
+
+
+def square(x, y, size):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+
+# 모든 섬이 허용 오차보다 작아 사라질 때는 고리 수가 아니라 면적이 가장 큰 폴리곤을 남겨야 함
+def test_fallback_keeps_largest_polygon():
+    big = [square(0, 0, 2)]
+    small_with_holes = [square(10, 10, 0.5), square(10.1, 10.1, 0.1), square(10.3, 10.3, 0.1)]
+    geometry = {'type': 'MultiPolygon', 'coordinates': [small_with_holes, big]}
+
+    simplified = simplify_geometry(geometry, tolerance=1.0, decimals=3)
+
+    assert simplified['type'] == 'Polygon'
+    assert _ring_area(simplified['coordinates'][0]) == 4
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from hotspot_polygons import parse_polygons, to_feature_collection
+
+# ----------------------------
+# 다발지역 폴리곤 GeoJSON 변환 확인
+# ----------------------------
+
+POLYGON_STRINGS = [
+    '{type:Polygon,coordinates:[[[128.775443,35.245161],[128.777443,35.245161],[128.777443,35.247161],[128.775443,35.245161]]]}',
+    '',
+    '{type:Polygon,coordinates:[[[126.97,37.56],[126.98,37.56],[126.98,37.57],[126.97,37.56]]]}',
+]
+
+
+# 속성 컬럼 없이 행 번호만 넘겨도 유효한 폴리곤마다 Feature가 하나씩 만들어져야 함 (sido_choropleth의 사용법)
+def test_feature_count_without_property_columns():
+    polygons = parse_polygons(POLYGON_STRINGS)
+    df = pd.DataFrame({'사고건수': [3, 1, 5]})
+    valid = df[polygons.is_valid[df.index]]
+
+    collection = to_feature_collection(polygons, valid[[]], decimals=5)
+
+    assert len(collection['features']) == 2
+    assert [feature['properties'] for feature in collection['features']] == [{'id': 0}, {'id': 2}]
+
+
+def test_feature_properties_from_columns():
+    polygons = parse_polygons(POLYGON_STRINGS)
+    df = pd.DataFrame({'사고건수': [3, 1, 5]}, index=[0, 1, 2])
+
+    collection = to_feature_collection(polygons, df)
+
+    assert [feature['properties'] for feature in collection['features']] == [{'id': 0, '사고건수': 3}, {'id': 2, '사고건수': 5}]
+    assert collection['features'][1]['geometry']['type'] == 'Polygon'
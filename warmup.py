@@ -0,0 +1,103 @@
+import logging
+import queue
+import threading
+import time
+
+import pandas as pd
+
+# ----------------------------
+# 무거운 데이터를 백그라운드 스레드에서 미리 불러오기
+# ----------------------------
+
+# app.py는 위에서부터 차례로 실행되므로 아래쪽 섹션의 데이터를 읽는 동안에는 그 뒤의 화면이 나오지 않는다.
+# 여기에 등록한 작업은 프로세스에 하나뿐인 백그라운드 스레드가 등록한 순서대로 실행하고,
+# 작업 함수는 cache.py의 캐시된 함수이므로 결과는 모든 세션이 함께 쓰는 캐시에 남는다.
+# 모듈은 rerun/세션 간에 남아 있으므로 같은 작업은 서버 프로세스에서 한 번만 실행되고,
+# 스크립트가 같은 함수를 먼저 호출하면 캐시의 키별 잠금 때문에 계산은 한 번만 하고 끝날 때까지 기다린다.
+
+STATUS_COLUMNS = ['작업', '상태', '소요시간(초)']
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupJob:
+    def __init__(self, name, func, args):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.error = None
+        self.seconds = None
+        self._started = False
+        self._done = threading.Event()
+
+    def run(self):
+        self._started = True
+        start = time.perf_counter()
+        try:
+            self.func(*self.args)
+        except Exception as e:  # 스크립트에서 다시 호출할 때 같은 오류가 화면에 표시됨
+            self.error = e
+            logger.exception('백그라운드 불러오기 실패: %s', self.name)
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._done.set()
+
+    # 작업이 끝났는지 (실패한 경우 포함)
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def status(self):
+        if self.done():
+            return '실패' if self.error is not None else '완료'
+        return '불러오는 중' if self._started else '대기'
+
+
+# (이름, 인자) -> 작업 (등록한 순서대로)
+_jobs = {}
+_jobs_lock = threading.Lock()
+_queue = queue.Queue()
+_worker = None
+
+
+def _work():
+    while True:
+        _queue.get().run()
+
+
+# func(*args)를 백그라운드에서 실행하도록 등록하고 작업을 반환 (같은 이름과 인자로 이미 등록했으면 그 작업)
+def start_warmup(name, func, *args):
+    global _worker
+    with _jobs_lock:
+        job = _jobs.get((name, args))
+        if job is not None:
+            return job
+        job = _jobs[(name, args)] = WarmupJob(name, func, args)
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name='warmup', daemon=True)
+            _worker.start()
+    _queue.put(job)
+    return job
+
+
+def wait_all(timeout=None):
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return all(job.wait(timeout) for job in jobs)
+
+
+# 등록된 작업 목록 지우기 (캐시를 비운 뒤 다시 미리 불러오게 할 때, 실행 중인 작업은 끝날 때까지 기다림)
+def clear_warmup():
+    wait_all()
+    with _jobs_lock:
+        _jobs.clear()
+
+
+def warmup_status():
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    rows = [[job.name, job.status, round(job.seconds, 3) if job.seconds is not None else None] for job in jobs]
+    return pd.DataFrame(rows, columns=STATUS_COLUMNS)
@@ -0,0 +1,37 @@
+import pandas as pd
+
+# ----------------------------
+# 요일별 시간대별 교통사고 통계 (.xls)
+# ----------------------------
+
+# 원본 시트는 위쪽 두 줄(연도, 시간대)이 열 머리글이고, 행은 (사고요일, 구분) 쌍이다.
+#   구분: 사고[건], 사망[명], 부상[명]
+# 연도와 요일, 시간대마다 '합계' 행/열이 함께 들어 있으므로 이를 빼고
+# (연도, 요일, 시간대, 구분, 값) 형태의 긴 표로 바꿔 여러 파일을 이어 붙이기 쉽게 한다.
+# 파일 이름의 연도 범위와 실제 시트의 연도가 다를 수 있어 연도는 머리글에서 읽는다.
+
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+TIME_SLOTS = ['00시-02시', '02시-04시', '04시-06시', '06시-08시', '08시-10시', '10시-12시',
+              '12시-14시', '14시-16시', '16시-18시', '18시-20시', '20시-22시', '22시-24시']
+
+
+# .xls 파일 하나를 긴 표로 변환 (parallel_loader.load_in_parallel에서 워커 프로세스로 실행 가능)
+def read_weekday_hour_xls(path):
+    df = pd.read_excel(path, header=[2, 3], index_col=[0, 1])
+    df.index.names = ['요일', '구분']
+    df.columns.names = ['연도', '시간대']
+    df = df[df.index.get_level_values('요일').isin(WEEKDAYS)]
+    df = df.loc[:, df.columns.get_level_values('시간대').isin(TIME_SLOTS)]
+
+    stats = df.stack(['연도', '시간대']).rename('값').reset_index()
+    stats['연도'] = stats['연도'].astype(int)
+    stats['값'] = stats['값'].astype('int64')
+    stats['요일'] = pd.Categorical(stats['요일'], categories=WEEKDAYS, ordered=True)
+    stats['시간대'] = pd.Categorical(stats['시간대'], categories=TIME_SLOTS, ordered=True)
+    return stats[['연도', '요일', '시간대', '구분', '값']]
+
+
+# 요일 x 시간대 표 (구분별, 여러 연도 합계)
+def weekday_hour_table(stats, kind='사고[건]'):
+    stats = stats[stats['구분'] == kind]
+    return stats.pivot_table(index='요일', columns='시간대', values='값', aggfunc='sum', observed=False)